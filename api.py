@@ -1,68 +1,97 @@
 import os
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' # Bloqueia logs inúteis do TF
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' # Bloqueia logs inúteis do TF (caso o .npz não exista)
 
 import sys
-from flask import Flask, jsonify, request
-import pandas as pd
-import joblib
-import tensorflow as tf
+import time
+from flask import Flask, Response, jsonify, make_response, request
 
 # 1. Ajuste do caminho para encontrar a pasta src
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
-from src.processing import load_scalers, load_encoders  # Importação específica
+from src.registry import PreprocessingRegistry, assinatura_arquivos
+from src.batching import MicroBatcher
+from src.formatos import codificar_resposta
+from src.cache import CachePrevisoes, BackendRedis
+from src.metrics import MetricasServico, Perfilador, versao_curta
 
 app = Flask(__name__)
 
 # 2. Carregar os artefatos (Certifique-se que os caminhos estão corretos)
-model = tf.keras.models.load_model('meu_modelo.keras')
-selector = joblib.load('objects/selector.joblib') # Adicionado caminho da pasta objects
+# Preprocessador, plano de seleção e modelo (motor NumPy, meu_modelo.npz: sem TensorFlow no processo
+# do serviço) ficam em memória e são recarregados juntos se objects/ ou o modelo mudarem
+registry = PreprocessingRegistry('objects', caminho_npz='meu_modelo.npz', caminho_keras='meu_modelo.keras')
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    try:
-        input_data = request.get_json()
-        
-        # O segredo: Converter o dicionário de listas em um DataFrame de várias linhas
-        df = pd.DataFrame(input_data)
+# 3. Micro-batching: requisições concorrentes viram um único model.predict
+# (BATCH_MAX_SIZE linhas ou BATCH_WINDOW_MS de espera, o que vier primeiro)
+batcher = MicroBatcher(
+    lambda X: registry.artefatos.predict(X),
+    max_batch_size=int(os.getenv('BATCH_MAX_SIZE', '64')),
+    janela_ms=float(os.getenv('BATCH_WINDOW_MS', '5')),
+)
 
-        # 1. Aplicar a Engenharia de Atributos antes da codificação
-        # (Se a sua função feature_engineering já estiver no src.processing)
-        if 'proporcaosolicitadototal' not in df.columns:
-             df = feature_engineering(pl.from_pandas(df)).to_pandas()
+# 4. Cache das previsões: o mesmo cliente reenviado (retentativas, refresh da tela) não passa pelo modelo
+# (a chave leva a versão da foto de artefatos que pontua: um modelo recarregado nunca herda previsões do antigo)
+cache = CachePrevisoes(
+    capacidade=int(os.getenv('CACHE_TAMANHO', '10000')),
+    ttl=float(os.getenv('CACHE_TTL', '300')),
+    backend=BackendRedis(os.environ['CACHE_REDIS_URL']) if os.getenv('CACHE_REDIS_URL') else None,
+)
 
-        # 2. Limpeza e Tipagem (Garantir que são floats/ints)
-        col_numericas = ['tempoprofissao', 'renda', 'idade', 'dependentes', 
-                        'valorsolicitado', 'valortotalbem', 'proporcaosolicitadototal']
-        for col in col_numericas:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+# 5. Instrumentação: tempo e erros por etapa (GET /metrics no formato do Prometheus)
+metricas = MetricasServico(habilitado=os.getenv('METRICAS', '1') != '0')
+# Perfil por amostragem de uma requisição com o header "X-Profile: 1" (apenas com PROFILE_HABILITADO=1)
+perfilador = Perfilador(habilitado=os.getenv('PROFILE_HABILITADO') == '1')
+
+def pontuar(df, artefatos):
+    # Recebe o DataFrame já tipado e com proporcaosolicitadototal (preparar_entrada, no cache)
+    # Padronização/codificação apenas das colunas do plano de seleção
+    # Uma só foto dos artefatos para o pré-processamento e o modelo
+    with metricas.etapa('preprocessamento'):
+        X = artefatos.transform(df)
+    with metricas.etapa('modelo'):
+        return batcher.predict(X, predict_fn=artefatos.predict)
+
+def processar():
+    try:
+        with metricas.etapa('json'):
+            input_data = request.get_json()
 
-        # 3. Processamento (Scalers e Encoders)
-        # IMPORTANTE: Use o transform em loop para cada coluna
-        df = load_scalers(df, col_numericas)
-        df = load_encoders(df, ['profissao', 'tiporesidencia', 'escolaridade', 'score', 
-                                'estadocivil', 'produto'])
-        
-        # 4. Seleção de Atributos (RFE)
-        # O transform do RFE precisa que as colunas estejam na ordem EXATA do treino
-        df_selected = selector.transform(df)
+        # 6. Predição (apenas os clientes que ainda não estão no cache); a mesma foto dos artefatos
+        # pontua e dá a versão das chaves do cache
+        artefatos = registry.artefatos
+        predictions = cache.prever(input_data, lambda df: pontuar(df, artefatos), artefatos.assinatura,
+                                   etapa=metricas.etapa)
 
-        # 5. Predição
-        predictions = model.predict(df_selected)
-        
-        # 6. Formatar resposta para os 4 clientes
-        respostas = []
-        for p in predictions:
-            prob = float(p[0])
-            respostas.append({
-                'probabilidade': prob,
-                'classe': 'bom' if prob > 0.5 else 'ruim'
-            })
-        
-        return jsonify({'status': 'sucesso', 'resultados': respostas})
+        # 7. Formatar resposta (montada de forma vetorizada, sem laço por cliente)
+        with metricas.etapa('resposta'):
+            corpo, tipo = codificar_resposta(predictions, 'linhas')
+        return Response(corpo, mimetype=tipo), len(predictions)
 
     except Exception as e:
-        return jsonify({'erro': str(e)}), 400
-    
+        return make_response(jsonify({'erro': str(e)}), 400), 0
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    inicio = time.perf_counter()
+    if perfilador.habilitado and request.headers.get('X-Profile'):
+        (resposta, linhas), caminho = perfilador.executar(processar)
+        if caminho:
+            resposta.headers['X-Profile-Arquivo'] = caminho
+    else:
+        resposta, linhas = processar()
+    metricas.registrar_requisicao(resposta.status_code, time.perf_counter() - inicio, linhas)
+    return resposta
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Fila/lotes do micro-batcher e acertos do cache; ?formato=json devolve o formato antigo
+    if request.args.get('formato') == 'json':
+        return jsonify({**batcher.metricas(), 'cache': cache.metricas()})
+    versoes = {
+        'modelo': versao_curta(assinatura_arquivos(['meu_modelo.npz', 'meu_modelo.keras'])),
+        'artefatos': versao_curta(registry.artefatos.assinatura),
+    }
+    texto = metricas.prometheus(versoes, batcher=batcher.metricas(), cache=cache.metricas())
+    return Response(texto, mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    # O uso do debug=False às vezes ajuda a estabilizar o carregamento do TensorFlow no Windows
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Versão assíncrona (ASGI) da API de previsão.
+
+Rodar com:  uvicorn api_asgi:app --host 0.0.0.0 --port 5000
+
+O trabalho pesado (pré-processamento e modelo) roda em um pool de threads
+(padrão) ou de processos (ASGI_EXECUTOR=process), então o event loop nunca
+fica bloqueado. Além do JSON do testeflask.py, aceita payloads colunares
+(Arrow IPC ou JSON com schema tipado) para pontuação em massa.
+"""
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from src.registry import PreprocessingRegistry, preparar_entrada
+from src.batching import MicroBatcher
+from src.formatos import ler_payload, formato_resposta, codificar_resposta, TIPO_JSON
+
+MODO_EXECUTOR = os.getenv('ASGI_EXECUTOR', 'thread')
+N_WORKERS = int(os.getenv('ASGI_WORKERS', str(os.cpu_count() or 1)))
+
+# Estado do processo (preenchido no startup, ou no initializer de cada processo do pool)
+estado = {}
+
+
+def carregar_estado():
+    # Preprocessador, plano de seleção e modelo: uma foto só, recarregada junta
+    estado['registry'] = PreprocessingRegistry('objects', caminho_npz='meu_modelo.npz',
+                                               caminho_keras='meu_modelo.keras')
+
+def pontuar(df):
+    # Usado pelos processos do pool: pré-processamento + modelo no próprio processo
+    return estado['registry'].prever(df)
+
+def transformar(df) -> tuple:
+    # Modo thread: a foto usada no pré-processamento também escolhe o modelo do micro-batcher
+    artefatos = estado['registry'].artefatos
+    return artefatos.transform(preparar_entrada(df)), artefatos.predict
+
+def ler_e_pontuar(corpo: bytes, content_type: str) -> tuple:
+    # Modo processo: leitura do payload e pontuação em uma única chamada ao pool
+    # (o DataFrame nunca volta serializado ao processo principal)
+    df, formato = ler_payload(corpo, content_type)
+    return pontuar(df), formato
+
+
+async def ler_corpo(receive) -> bytes:
+    partes = []
+    while True:
+        mensagem = await receive()
+        partes.append(mensagem.get('body', b''))
+        if not mensagem.get('more_body', False):
+            return b''.join(partes)
+
+async def responder(send, status: int, corpo: bytes, content_type: str = TIPO_JSON):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(corpo)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': corpo})
+
+async def responder_json(send, status: int, dados: dict):
+    await responder(send, status, json.dumps(dados).encode())
+
+
+async def predict(scope, receive, send):
+    headers = {k.decode().lower(): v.decode() for k, v in scope.get('headers', [])}
+    content_type = headers.get('content-type', TIPO_JSON)
+    accept = headers.get('accept', '')
+    loop = asyncio.get_running_loop()
+    try:
+        corpo = await ler_corpo(receive)
+        if MODO_EXECUTOR == 'process':
+            predictions, formato = await loop.run_in_executor(estado['executor'], ler_e_pontuar, corpo, content_type)
+        else:
+            df, formato = await loop.run_in_executor(estado['executor'], ler_payload, corpo, content_type)
+            X, predict_fn = await loop.run_in_executor(estado['executor'], transformar, df)
+            # O micro-batcher devolve um concurrent.futures.Future: aguardamos sem bloquear o loop
+            predictions = await asyncio.wrap_future(estado['batcher'].submit(X, predict_fn))
+
+        # Payload colunar recebe resposta colunar; o formato antigo continua recebendo uma linha por cliente
+        resposta, tipo = codificar_resposta(predictions, formato_resposta(formato, accept))
+        await responder(send, 200, resposta, tipo)
+
+    except Exception as e:
+        await responder_json(send, 400, {'erro': str(e)})
+
+async def metrics(scope, receive, send):
+    dados = estado['batcher'].metricas() if 'batcher' in estado else {}
+    await responder_json(send, 200, {**dados, 'executor': MODO_EXECUTOR, 'workers': N_WORKERS})
+
+ROTAS = {
+    ('POST', '/predict'): predict,
+    ('GET', '/metrics'): metrics,
+}
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'lifespan.startup':
+            if MODO_EXECUTOR == 'process':
+                # Cada processo carrega o próprio registry (com o modelo) uma única vez
+                estado['executor'] = ProcessPoolExecutor(N_WORKERS, initializer=carregar_estado)
+            else:
+                carregar_estado()
+                estado['executor'] = ThreadPoolExecutor(N_WORKERS)
+                estado['batcher'] = MicroBatcher(
+                    lambda X: estado['registry'].artefatos.predict(X),
+                    max_batch_size=int(os.getenv('BATCH_MAX_SIZE', '64')),
+                    janela_ms=float(os.getenv('BATCH_WINDOW_MS', '5')),
+                )
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensagem['type'] == 'lifespan.shutdown':
+            if 'batcher' in estado:
+                estado['batcher'].close()
+            estado['executor'].shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+    if scope['type'] != 'http':
+        return
+
+    rota = ROTAS.get((scope['method'], scope['path']))
+    if rota is None:
+        await responder_json(send, 404, {'erro': f"Rota não encontrada: {scope['method']} {scope['path']}"})
+        return
+    await rota(scope, receive, send)
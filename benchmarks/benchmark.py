@@ -0,0 +1,243 @@
+"""
+Benchmark reprodutível do caminho de pontuação.
+
+Gera clientes sintéticos (categorias do modelo treinado e valores numéricos
+sorteados com a média/desvio do treino), mede cada etapa separadamente para
+vários tamanhos de lote e, opcionalmente, coloca a API Flask sob carga
+concorrente. O resultado vai para benchmarks/resultados/<commit>.json.
+
+Uso (na raiz do projeto):
+    python benchmarks/benchmark.py
+    python benchmarks/benchmark.py --tamanhos 1 100 10000 --sem-carga
+    python benchmarks/benchmark.py --comparar benchmarks/resultados/a.json benchmarks/resultados/b.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(RAIZ)
+os.chdir(RAIZ)  # api.py e o registry usam caminhos relativos à raiz
+
+import polars as pl
+
+from src.const import LIMITES_OUTLIERS
+from src.engine import carregar_modelo
+from src.formatos import codificar_resposta
+from src.registry import PreprocessingRegistry, preparar_entrada
+
+TAMANHOS_PADRAO = [1, 10, 100, 1_000, 10_000, 100_000]
+CONCORRENCIAS_PADRAO = [1, 4, 16, 64]
+ETAPAS = ["json_parse", "dataframe", "preprocessamento", "modelo", "resposta"]
+
+
+def gerar_clientes(n: int, preprocessador, seed: int = 42) -> dict:
+    """
+    Clientes sintéticos no formato do testeflask.py (dicionário de listas).
+    Categorias: as mesmas classes dos encoders (listas do webapp.py).
+    Numéricas: normal com média/desvio do treino, truncada em valores plausíveis.
+    """
+    rng = np.random.default_rng(seed)
+    dados = {c: rng.choice(preprocessador.classes[c], n).tolist() for c in preprocessador.col_categoricas}
+
+    for coluna, media, escala in zip(preprocessador.col_numericas, preprocessador.media, preprocessador.escala):
+        if coluna == "proporcaosolicitadototal":
+            continue
+        valores = np.clip(rng.normal(media, escala, n), *LIMITES_OUTLIERS.get(coluna, (0, None)))
+        dados[coluna] = (np.round(valores) if coluna in ("tempoprofissao", "idade", "dependentes")
+                         else np.round(valores, 2)).tolist()
+    # O bem vale sempre mais do que o valor solicitado
+    dados["valortotalbem"] = np.maximum(dados["valortotalbem"], np.array(dados["valorsolicitado"]) + 1).tolist()
+    return dados
+
+
+def medir(funcao, repeticoes_min: int = 3, tempo_min: float = 0.2) -> dict:
+    """Executa `funcao` até somar `tempo_min` segundos (mínimo de `repeticoes_min` vezes)."""
+    tempos = []
+    inicio = time.perf_counter()
+    while len(tempos) < repeticoes_min or time.perf_counter() - inicio < tempo_min:
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+    tempos = np.array(tempos)
+    return {
+        "repeticoes": len(tempos),
+        "mediana_ms": float(np.median(tempos) * 1e3),
+        "p95_ms": float(np.percentile(tempos, 95) * 1e3),
+        "min_ms": float(tempos.min() * 1e3),
+    }
+
+
+def benchmark_etapas(model, registry, tamanhos: list, seed: int) -> list:
+    artefatos = registry.artefatos
+    resultados = []
+    for n in tamanhos:
+        dados = gerar_clientes(n, artefatos.preprocessador, seed)
+        corpo = json.dumps(dados).encode()
+
+        # Entradas de cada etapa calculadas uma vez, para medir as etapas isoladamente
+        df = preparar_entrada(dados)
+        X = artefatos.transform(df)
+        probabilidades = model.predict(X, verbose=0)
+
+        etapas = {
+            "json_parse": medir(lambda: json.loads(corpo)),
+            "dataframe": medir(lambda: preparar_entrada(dados)),
+            "preprocessamento": medir(lambda: artefatos.transform(df)),
+            "modelo": medir(lambda: model.predict(X, verbose=0)),
+            "resposta": medir(lambda: codificar_resposta(probabilidades, "linhas")),
+            "total": medir(lambda: codificar_resposta(
+                model.predict(registry.transform(json.loads(corpo)), verbose=0), "linhas")),
+        }
+        total = etapas["total"]["mediana_ms"]
+        print(f"📏 n={n:>7}: total {total:9.2f} ms ({n / total * 1e3:,.0f} linhas/s) | "
+              + " ".join(f"{e}={etapas[e]['mediana_ms']:.2f}" for e in ETAPAS))
+        resultados.append({"tamanho_lote": n, "linhas_por_segundo": n / total * 1e3, "etapas": etapas})
+    return resultados
+
+
+def benchmark_carga(concorrencias: list, requisicoes: int, clientes_por_requisicao: int, seed: int) -> list:
+    """Sobe a API Flask (api.py) em uma thread local e a bombardeia com requisições concorrentes."""
+    import logging
+    import requests
+    from werkzeug.serving import make_server
+    import api
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # sem uma linha de log por requisição
+
+    servidor = make_server("127.0.0.1", 0, api.app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}/predict"
+
+    # Um cliente diferente por requisição: o cache de previsões não pode mascarar o custo real
+    total = requisicoes * clientes_por_requisicao
+    dados = gerar_clientes(total, api.registry.artefatos.preprocessador, seed)
+    payloads = [
+        {c: v[i * clientes_por_requisicao:(i + 1) * clientes_por_requisicao] for c, v in dados.items()}
+        for i in range(requisicoes)
+    ]
+
+    resultados = []
+    try:
+        for concorrencia in concorrencias:
+            api.cache.limpar()
+            sessoes = threading.local()
+
+            def enviar(payload):
+                if not hasattr(sessoes, "s"):
+                    sessoes.s = requests.Session()
+                t0 = time.perf_counter()
+                resposta = sessoes.s.post(url, json=payload)
+                return time.perf_counter() - t0, resposta.status_code
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(concorrencia) as pool:
+                respostas = list(pool.map(enviar, payloads))
+            duracao = time.perf_counter() - inicio
+
+            latencias = np.array([r[0] for r in respostas]) * 1e3
+            erros = sum(1 for r in respostas if r[1] != 200)
+            resultado = {
+                "concorrencia": concorrencia,
+                "requisicoes": requisicoes,
+                "clientes_por_requisicao": clientes_por_requisicao,
+                "erros": erros,
+                "requisicoes_por_segundo": requisicoes / duracao,
+                "p50_ms": float(np.percentile(latencias, 50)),
+                "p95_ms": float(np.percentile(latencias, 95)),
+                "p99_ms": float(np.percentile(latencias, 99)),
+                "batcher": api.batcher.metricas(),
+            }
+            print(f"🔥 concorrência {concorrencia:>3}: {resultado['requisicoes_por_segundo']:8.1f} req/s | "
+                  f"p50 {resultado['p50_ms']:.1f} ms | p95 {resultado['p95_ms']:.1f} ms | "
+                  f"p99 {resultado['p99_ms']:.1f} ms | erros {erros}")
+            resultados.append(resultado)
+    finally:
+        servidor.shutdown()
+    return resultados
+
+
+def ambiente() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except Exception:
+            return None
+
+    return {
+        "commit": git("describe", "--always", "--dirty"),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "polars": pl.__version__,
+    }
+
+
+def comparar(caminho_base: str, caminho_novo: str):
+    """Imprime a variação da mediana de cada etapa entre dois resultados."""
+    with open(caminho_base) as f:
+        base = json.load(f)
+    with open(caminho_novo) as f:
+        novo = json.load(f)
+    print(f"📊 {base['ambiente']['commit']} -> {novo['ambiente']['commit']} (razão < 1 = mais rápido)")
+
+    lotes_base = {r["tamanho_lote"]: r["etapas"] for r in base.get("etapas", [])}
+    for r in novo.get("etapas", []):
+        if r["tamanho_lote"] not in lotes_base:
+            continue
+        razoes = {
+            e: r["etapas"][e]["mediana_ms"] / lotes_base[r["tamanho_lote"]][e]["mediana_ms"]
+            for e in r["etapas"] if e in lotes_base[r["tamanho_lote"]]
+        }
+        print(f"  n={r['tamanho_lote']:>7}: " + " ".join(f"{e}={v:.2f}x" for e, v in razoes.items()))
+
+    carga_base = {r["concorrencia"]: r for r in base.get("carga", [])}
+    for r in novo.get("carga", []):
+        if r["concorrencia"] in carga_base:
+            b = carga_base[r["concorrencia"]]
+            print(f"  concorrência {r['concorrencia']:>3}: req/s {r['requisicoes_por_segundo'] / b['requisicoes_por_segundo']:.2f}x"
+                  f" | p95 {r['p95_ms'] / b['p95_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de latência e vazão da pontuação")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="Tamanhos de lote")
+    parser.add_argument("--concorrencias", type=int, nargs="+", default=CONCORRENCIAS_PADRAO,
+                        help="Clientes simultâneos no teste de carga")
+    parser.add_argument("--requisicoes", type=int, default=500, help="Requisições por nível de concorrência")
+    parser.add_argument("--clientes-por-requisicao", type=int, default=1)
+    parser.add_argument("--sem-carga", action="store_true", help="Pula o teste de carga da API Flask")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", default=None, help="Arquivo JSON (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NOVO"), help="Compara dois resultados e sai")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        raise SystemExit(0)
+
+    resultado = {"ambiente": ambiente()}
+    print(f"🚀 Benchmark em {resultado['ambiente']['commit']} ({resultado['ambiente']['cpus']} CPUs)")
+
+    model = carregar_modelo("meu_modelo.npz", "meu_modelo.keras")
+    registry = PreprocessingRegistry("objects")
+    resultado["etapas"] = benchmark_etapas(model, registry, args.tamanhos, args.seed)
+    if not args.sem_carga:
+        resultado["carga"] = benchmark_carga(args.concorrencias, args.requisicoes,
+                                             args.clientes_por_requisicao, args.seed)
+
+    saida = args.saida or os.path.join("benchmarks", "resultados", f"{resultado['ambiente']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(saida), exist_ok=True)
+    with open(saida, "w") as f:
+        json.dump(resultado, f, indent=2)
+    print(f"✅ Resultado salvo em {saida}")
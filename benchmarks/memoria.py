@@ -0,0 +1,171 @@
+"""
+Relatório de memória (pico de RSS) da passagem Polars → NumPy no treino e na inferência.
+
+Compara, em processos separados e sobre a mesma base sintética limpa:
+  - "legado": o fluxo original do model_creation.py/xai.py (to_pandas → scalers e
+    encoders em pandas → pl.from_pandas, ida e volta por etapa, matriz float64,
+    cópia do selector.transform e conversão para float32 no modelo);
+  - "atual": Enum + Preprocessador.transform direto em float32 e uma única cópia
+    com as colunas do plano de seleção, usada pelo modelo e pelo LIME.
+O resultado vai para benchmarks/resultados/memoria-<commit>.json.
+
+Uso (na raiz do projeto):
+    python benchmarks/memoria.py
+    python benchmarks/memoria.py --linhas 5000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(RAIZ)
+os.chdir(RAIZ)
+
+import polars as pl
+
+from benchmarks.benchmark import ambiente, gerar_clientes
+from src.const import COL_CATEGORICAS, COL_NUMERICAS, COLUNAS_MODELO
+from src.preprocessador import Preprocessador
+from src.processing import feature_engineering
+
+MODOS = ["legado", "atual"]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for linha in f:
+            if linha.startswith("VmRSS:"):
+                return int(linha.split()[1]) / 1024
+    return 0.0
+
+
+def pico_rss_mb() -> float:
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def gerar_base(caminho: str, linhas: int, seed: int):
+    """Base limpa sintética (texto, como sai do banco) gravada em Parquet para os dois modos."""
+    preprocessador = Preprocessador.load("objects/preprocessador.joblib")
+    partes = []
+    for i, inicio in enumerate(range(0, linhas, 1_000_000)):
+        dados = gerar_clientes(min(1_000_000, linhas - inicio), preprocessador, seed + i)
+        partes.append(feature_engineering(pl.DataFrame(dados)))
+    df = pl.concat(partes)
+    classe = np.where(np.random.default_rng(seed).random(df.height) < 0.5, "bom", "ruim")
+    df.with_columns(pl.Series("classe", classe)).write_parquet(caminho)
+
+
+def modo_legado(df: pl.DataFrame, mascara: np.ndarray, model):
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    def scalers(df_pl):
+        df_pd = df_pl.to_pandas()
+        for col in COL_NUMERICAS:
+            df_pd[col] = StandardScaler().fit_transform(df_pd[[col]])
+        return pl.from_pandas(df_pd)
+
+    def encoders(df_pl):
+        df_pd = df_pl.to_pandas()
+        for col in COL_CATEGORICAS:
+            df_pd[col] = LabelEncoder().fit_transform(df_pd[col])
+        return pl.from_pandas(df_pd)
+
+    X = df.drop("classe").to_pandas()
+    y = df.select("classe").to_pandas()["classe"].map({'ruim': 0, 'bom': 1})
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=41)
+    X_train = encoders(scalers(pl.from_pandas(X_train))).to_pandas()
+    X_test = encoders(scalers(pl.from_pandas(X_test))).to_pandas()
+    # selector.transform: cópia float64 das colunas selecionadas
+    X_train = X_train[COLUNAS_MODELO].to_numpy()[:, mascara]
+    X_test = X_test[COLUNAS_MODELO].to_numpy()[:, mascara]
+    return model.predict(X_test)
+
+
+def modo_atual(df: pl.DataFrame, mascara: np.ndarray, model):
+    from sklearn.model_selection import train_test_split
+    from src.processing import tipar_categoricas
+
+    df = tipar_categoricas(df)
+    idx_train, idx_test = train_test_split(np.arange(df.height), test_size=0.2, random_state=41)
+    df_train, df_test = df[idx_train], df[idx_test]
+    del df
+    preprocessador = Preprocessador().fit(df_train)
+    X_train = preprocessador.transform(df_train, dtype=np.float32)
+    X_test = preprocessador.transform(df_test, dtype=np.float32)
+    # Única cópia: as colunas do plano, C-contíguas, entregues ao modelo e ao LIME
+    X_train = np.ascontiguousarray(X_train[:, mascara])
+    X_test = np.ascontiguousarray(X_test[:, mascara])
+    return model.predict(X_test)
+
+
+def medir_modo(modo: str, caminho: str) -> dict:
+    """Roda um modo no processo atual (chamado em um subprocesso limpo)."""
+    from src.engine import NumpyMLP
+    from src.preprocessador import carregar_plano_selecao
+
+    plano = carregar_plano_selecao()
+    mascara = np.array([c in plano for c in COLUNAS_MODELO])
+    model = NumpyMLP.load("meu_modelo.npz")
+    df = pl.read_parquet(caminho)
+    rss_base = rss_mb()
+
+    inicio = time.perf_counter()
+    (modo_legado if modo == "legado" else modo_atual)(df, mascara, model)
+    return {
+        "modo": modo,
+        "linhas": df.height,
+        "segundos": time.perf_counter() - inicio,
+        "rss_dados_mb": rss_base,
+        "pico_rss_mb": pico_rss_mb(),
+        # Quanto o fluxo sobe acima da base já carregada
+        "pico_acima_dados_mb": pico_rss_mb() - rss_base,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pico de RSS do fluxo Polars → NumPy (legado x atual)")
+    parser.add_argument("--linhas", type=int, default=2_000_000, help="Linhas da base sintética")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", default=None,
+                        help="Arquivo JSON (padrão: benchmarks/resultados/memoria-<commit>.json)")
+    parser.add_argument("--modo", choices=MODOS, help=argparse.SUPPRESS)
+    parser.add_argument("--base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        # Subprocesso: mede um modo e devolve o resultado em JSON na saída padrão
+        print(json.dumps(medir_modo(args.modo, args.base)))
+        raise SystemExit(0)
+
+    resultado = {"ambiente": ambiente(), "linhas": args.linhas, "modos": []}
+    print(f"🧪 Base sintética com {args.linhas:,} linhas...")
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "base.parquet")
+        gerar_base(base, args.linhas, args.seed)
+        for modo in MODOS:
+            saida = subprocess.run([sys.executable, __file__, "--modo", modo, "--base", base],
+                                   capture_output=True, text=True, check=True).stdout
+            medicao = json.loads(saida.strip().splitlines()[-1])
+            resultado["modos"].append(medicao)
+            print(f"  📈 {modo:>6}: pico {medicao['pico_rss_mb']:,.0f} MB "
+                  f"(+{medicao['pico_acima_dados_mb']:,.0f} MB sobre os dados) em {medicao['segundos']:.1f}s")
+
+    legado, atual = resultado["modos"]
+    resultado["reducao_pico"] = 1 - atual["pico_rss_mb"] / legado["pico_rss_mb"]
+    print(f"✅ Pico de RSS {resultado['reducao_pico']:.0%} menor no fluxo atual")
+
+    saida = args.saida or os.path.join("benchmarks", "resultados",
+                                       f"memoria-{resultado['ambiente']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(saida), exist_ok=True)
+    with open(saida, "w") as f:
+        json.dump(resultado, f, indent=2)
+    print(f"💾 Relatório salvo em {saida}")
@@ -1,56 +1,32 @@
-import polars as pl
-from src.database import execute_query
-from src.processing import calcular_idade, limpar_moeda
-
-def gerar_base_ia():
-    print("🚀 Extraindo dados brutos...")
-    
-    # Extraímos as tabelas necessárias
-    df_clientes = execute_query("SELECT * FROM clientes")
-    df_pedidos = execute_query("SELECT * FROM pedidocredito WHERE status = 'Aprovado'")
-    df_parcelas = execute_query("SELECT * FROM parcelascredito")
-    df_produtos = execute_query("SELECT * FROM produtosfinanciados")
-
-    print("🧠 Processando lógica de negócio com Polars...")
-
-    # 1. Definir a Classe (Bom/Ruim) na tabela de parcelas
-    # Agrupamos por solicitacaoid e verificamos se existe algum 'Vencido'
-    df_target = (
-        df_parcelas.group_by("solicitacaoid")
-        .agg(
-            pl.col("status").filter(pl.col("status") == "Vencido").count().alias("qtd_vencidos")
-        )
-        .with_columns(
-            pl.when(pl.col("qtd_vencidos") > 0).then(pl.lit("ruim")).otherwise(pl.lit("bom")).alias("classe")
-        )
-    )
-
-    # 2. Unindo as tabelas (Joins)
-    df_final = (
-        df_pedidos
-        .join(df_clientes, on="clienteid")
-        .join(df_produtos, on="produtoid")
-        .join(df_target, on="solicitacaoid", how="left")
-        # Se não tem parcela vencida e não está no df_target, consideramos 'bom'
-        .with_columns(pl.col("classe").fill_null("bom"))
-    )
-
-    # 3. Transformações Finais (Idade e Limpeza de Moeda)
-    df_final = df_final.with_columns([
-        calcular_idade(pl.col("datanascimento")).alias("idade"),
-        limpar_moeda(pl.col("valorsolicitado")).alias("valor_solicitado"),
-        limpar_moeda(pl.col("valortotalbem")).alias("valor_total_bem")
-    ])
-
-    # 4. Selecionando apenas as colunas que o professor usou
-    colunas_finais = [
-        "profissao", "tempoprofissao", "renda", "tiporesidencia", 
-        "escolaridade", "score", "idade", "dependentes", 
-        "estadocivil", "nomecomercial", "valor_solicitado", 
-        "valor_total_bem", "classe"
-    ]
-    
-    dataset = df_final.select(colunas_finais)
+from src.const import RENOMEAR, VALORES_VALIDOS, LIMITES_OUTLIERS
+from src.dataset import construir_base
+from src.feature_store import SNAPSHOT_BASE_IA, gravar_snapshot
+from src.incremental import TABELAS_INCREMENTAIS, ALVO, atualizar_incremental, reiniciar_tabela
+from src.processing import pipeline_limpeza
+
+def gerar_base_ia(estrategia: str = "lazy", incremental: bool = True, conferencia_completa: bool = False):
+    """
+    estrategia="sql":  agregação das parcelas e joins feitos no Postgres (só o resultado trafega)
+    estrategia="paralela": tabelas buscadas ao mesmo tempo (só as colunas usadas) e unidas localmente
+    estrategia="lazy": fotos locais em Parquet (atualizadas por watermark) lidas com LazyFrame
+    """
+    if estrategia == "lazy":
+        if not incremental:
+            # Extração completa: descarta as fotos locais e os watermarks
+            for tabela in [*TABELAS_INCREMENTAIS, ALVO]:
+                reiniciar_tabela(tabela)
+
+        print("🚀 Extraindo dados brutos (apenas o que mudou desde o último watermark)...")
+        # --conferir-tudo: confere o hash de todas as linhas já extraídas, não só das mais recentes
+        resumo = atualizar_incremental(conferencia_completa=conferencia_completa)
+        for tabela, linhas in resumo.items():
+            print(f"  📥 {tabela}: {linhas} chaves novas/alteradas")
+
+    print(f"🧠 Montando a base de treinamento (estratégia '{estrategia}')...")
+    dataset, relatorio = construir_base(estrategia)
+    for fonte, info in relatorio.items():
+        tempo = f" em {info['segundos']:.2f}s" if "segundos" in info else ""
+        print(f"  📊 {fonte}: {info['linhas']} linhas, {info['bytes'] / 1024 ** 2:.2f} MB{tempo}")
 
     print(f"✅ Dataset criado com {dataset.shape[0]} linhas!")
     print(dataset.head())
@@ -59,5 +35,15 @@ def gerar_base_ia():
     dataset.write_parquet("data/raw/base_treinamento.parquet")
     print("💾 Arquivo salvo em data/raw/base_treinamento.parquet")
 
+    # Features limpas no feature store (pontuar_lote/explicar_lote --snapshot base_ia). Não é o snapshot
+    # "treinamento": aquele sai do pipeline de treino, com a definição da QUERY_TREINAMENTO
+    limpo = pipeline_limpeza(dataset.rename(RENOMEAR), VALORES_VALIDOS, LIMITES_OUTLIERS, colunas_moeda=())
+    gravar_snapshot(limpo, SNAPSHOT_BASE_IA, origem=f"criar_dataset:{estrategia}")
+
 if __name__ == "__main__":
-    gerar_base_ia()
\ No newline at end of file
+    import sys
+    gerar_base_ia(
+        estrategia="sql" if "--sql" in sys.argv else "paralela" if "--paralela" in sys.argv else "lazy",
+        incremental="--completo" not in sys.argv,
+        conferencia_completa="--conferir-tudo" in sys.argv,
+    )
\ No newline at end of file
@@ -1,16 +1,15 @@
-import polars as pl
-from src.database import execute_query
+from src.database import executar_consultas
 
 def mapeamento_visual():
     print("👀 --- MAPEAMENTO VISUAL DE COLUNAS --- 👀\n")
     
     tabelas = ["clientes", "pedidocredito", "parcelascredito", "produtosfinanciados"]
     
-    for tabela in tabelas:
+    # Pegamos apenas 1 linha de cada tabela para ver o cabeçalho e tipos (todas ao mesmo tempo, via pool)
+    amostras = executar_consultas({tabela: f"SELECT * FROM {tabela} LIMIT 1" for tabela in tabelas})
+
+    for tabela, df in amostras.items():
         print(f"📌 Tabela: {tabela}")
-        # Pegamos apenas 1 linha para ver o cabeçalho e tipos
-        df = execute_query(f"SELECT * FROM {tabela} LIMIT 1")
-        
         # Exibe as colunas e os tipos detectados pelo Polars
         for col, dtype in zip(df.columns, df.dtypes):
             print(f"  - {col}: {dtype}")
@@ -0,0 +1,65 @@
+import argparse
+import os
+
+import numpy as np
+import polars as pl
+
+from src.const import COLUNAS_MODELO, RENOMEAR
+from src.explicacao import CAMINHO_EXPLICACOES, explicar_lote
+from src.feature_store import arquivos_snapshot
+from src.registry import ArtefatosPreprocessamento, preparar_entrada
+from src.training import CAMINHO_FEATURES_TREINO
+
+
+def run(entrada: str, saida: str = CAMINHO_EXPLICACOES, workers: int = None, todos: bool = False,
+        limite: int = None, coluna_id: str = None, num_features: int = 10, num_samples: int = 5000,
+        caminho_npz: str = "meu_modelo.npz", diretorio_objetos: str = "objects") -> pl.DataFrame:
+    # entrada: um Parquet ou a lista de partes de um snapshot do feature store
+    df = pl.read_parquet(entrada, n_rows=limite)
+    df = df.rename({antigo: novo for antigo, novo in RENOMEAR.items() if antigo in df.columns})
+    ids = df.get_column(coluna_id).to_numpy() if coluna_id else np.arange(df.height)
+
+    artefatos = ArtefatosPreprocessamento(diretorio_objetos, caminho_npz)
+    # Mesma limpeza do treino (como no pontuar_lote); linhas ainda incompletas não têm como ser explicadas
+    df = artefatos.limpar(df)
+    validas = df.select(pl.all_horizontal(pl.col(COLUNAS_MODELO).is_not_null())).to_series()
+    if not validas.all():
+        print(f"⚠️ {df.height - validas.sum()} linhas ignoradas (dados incompletos mesmo depois da limpeza)")
+        df, ids = df.filter(validas), ids[validas.to_numpy()]
+    X = artefatos.transform(preparar_entrada(df))
+    if not todos:
+        # Por padrão só os pedidos recusados (probabilidade de "bom" <= 0.5) precisam de justificativa
+        recusados = artefatos.predict(X).reshape(-1) <= 0.5
+        X, ids = X[recusados], ids[recusados]
+        print(f"📋 {len(X)} de {df.height} pedidos recusados para explicar")
+
+    pesos = explicar_lote(X, ids, caminho_features=CAMINHO_FEATURES_TREINO, caminho_npz=caminho_npz,
+                          workers=workers, num_features=num_features, num_samples=num_samples,
+                          treino=artefatos.treino)
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    pesos.write_parquet(saida, compression="zstd")
+    print(f"💾 Pesos gravados em {saida} ({pesos.height} linhas)")
+    return pesos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explicações LIME em lote (pesos em Parquet, sem HTML)")
+    parser.add_argument("entrada", nargs="?", default="data/raw/base_treinamento.parquet",
+                        help="Parquet de entrada (padrão: data/raw/base_treinamento.parquet)")
+    parser.add_argument("--snapshot", default=None,
+                        help="Explica um snapshot do feature store em vez da entrada (nome ou nome@versao)")
+    parser.add_argument("--saida", default=CAMINHO_EXPLICACOES, help="Parquet de saída no formato longo")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos no pool")
+    parser.add_argument("--todos", action="store_true", help="Explica todos os pedidos, não só os recusados")
+    parser.add_argument("--limite", type=int, default=None, help="Lê apenas as primeiras N linhas")
+    parser.add_argument("--id", dest="coluna_id", default=None,
+                        help="Coluna de identificação copiada para a saída (padrão: número da linha)")
+    parser.add_argument("--amostras", type=int, default=5000, help="Amostras perturbadas por linha (LIME)")
+    args = parser.parse_args()
+
+    entrada = args.entrada
+    if args.snapshot:
+        nome, _, versao = args.snapshot.partition("@")
+        entrada = arquivos_snapshot(nome, versao or None)
+    run(entrada, args.saida, args.workers, args.todos, args.limite, args.coluna_id,
+        num_samples=args.amostras)
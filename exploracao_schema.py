@@ -1,4 +1,4 @@
-from src.database import execute_query
+from src.database import executar_consultas
 import polars as pl
 
 def explorar_banco():
@@ -13,11 +13,6 @@ def explorar_banco():
     FROM pg_stat_user_tables 
     ORDER BY total_registros DESC
     """
-    df_tabelas = execute_query(query_tabelas)
-    print("1. Tabelas e Volume de Dados:")
-    print(df_tabelas)
-    print("-" * 30)
-
     # 2. Verificar Colunas, Tipos e Chaves Primárias
     # Vamos focar nas tabelas do schema 'public'
     query_colunas = """
@@ -35,13 +30,6 @@ def explorar_banco():
     WHERE c.table_schema = 'public'
     ORDER BY c.table_name
     """
-    df_colunas = execute_query(query_colunas)
-    print("2. Estrutura de Colunas e Chaves:")
-    # Filtrando para ver as PKs (Primary Keys)
-    pks = df_colunas.filter(pl.col("constraint_type") == "PRIMARY KEY")
-    print(pks)
-    print("-" * 30)
-
     # 3. Identificar Chaves Estrangeiras (Relacionamentos)
     query_fks = """
     SELECT
@@ -58,7 +46,21 @@ def explorar_banco():
       AND ccu.table_schema = tc.table_schema
     WHERE tc.constraint_type = 'FOREIGN KEY'
     """
-    df_fks = execute_query(query_fks)
+
+    # As três consultas são independentes: rodam ao mesmo tempo em conexões do pool
+    resultados = executar_consultas({"tabelas": query_tabelas, "colunas": query_colunas, "fks": query_fks})
+    df_tabelas, df_colunas, df_fks = resultados["tabelas"], resultados["colunas"], resultados["fks"]
+
+    print("1. Tabelas e Volume de Dados:")
+    print(df_tabelas)
+    print("-" * 30)
+
+    print("2. Estrutura de Colunas e Chaves:")
+    # Filtrando para ver as PKs (Primary Keys)
+    pks = df_colunas.filter(pl.col("constraint_type") == "PRIMARY KEY")
+    print(pks)
+    print("-" * 30)
+
     print("3. Relacionamentos (Chaves Estrangeiras):")
     print(df_fks)
 
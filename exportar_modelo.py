@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from src.engine import exportar_pesos, identificar_pesos, NumpyMLP
+from src.preprocessador import Preprocessador
+
+def run(caminho_keras='meu_modelo.keras', caminho_npz='meu_modelo.npz', diretorio='objects'):
+    print(f"📦 Exportando pesos de {caminho_keras}...")
+    # O .npz precisa do mesmo id de treino dos artefatos em objects/, senão a API e o webapp recusam a foto
+    caminho_preprocessador = os.path.join(diretorio, 'preprocessador.joblib')
+    treino = Preprocessador.load(caminho_preprocessador).treino if os.path.exists(caminho_preprocessador) else None
+    if treino is None:
+        exportar_pesos(caminho_keras, caminho_npz)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(exportar_pesos(caminho_keras, os.path.join(tmp, 'modelo.npz')), 'rb') as f:
+                identificar_pesos(f.read(), caminho_npz, treino)
+        print(f"🏷️ Treino {treino} (de {caminho_preprocessador})")
+
+    # Conferência: o motor NumPy precisa bater com o model.predict do Keras
+    import tensorflow as tf
+    model = tf.keras.models.load_model(caminho_keras)
+    inicio = time.perf_counter()
+    engine = NumpyMLP.load(caminho_npz)
+    print(f"⏱️ Motor NumPy carregado em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    X = np.random.default_rng(0).normal(size=(1000, engine.n_features)).astype(np.float32)
+    esperado = model.predict(X, verbose=0)
+    diferenca = np.abs(esperado - engine.predict(X)).max()
+    print(f"🔍 Maior diferença para o Keras: {diferenca:.2e}")
+    if not np.allclose(esperado, engine.predict(X), atol=1e-5):
+        raise SystemExit("❌ Motor NumPy diverge do modelo Keras!")
+    print(f"💾 Pesos salvos em {caminho_npz}")
+
+if __name__ == "__main__":
+    run(*sys.argv[1:4])
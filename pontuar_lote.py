@@ -0,0 +1,133 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+
+from src.const import COLUNAS_MODELO, RENOMEAR
+from src.feature_store import arquivos_snapshot
+from src.formatos import resultados
+from src.registry import PreprocessingRegistry, preparar_entrada
+
+# Estado de cada processo do pool (carregado uma única vez no initializer)
+estado = {}
+
+
+def iniciar_worker(caminho_npz: str, caminho_keras: str, diretorio_objetos: str):
+    estado["registry"] = PreprocessingRegistry(diretorio_objetos, caminho_npz=caminho_npz,
+                                               caminho_keras=caminho_keras)
+
+def pontuar_grupo(arquivo: str, grupo: int, indice: int, inicio: int, saida: str,
+                  coluna_id: str = None) -> tuple:
+    """
+    Pontua o row group `grupo` de `arquivo` e grava saida/part-<indice>.parquet (índice global).
+    Retorna (linhas, linhas sem previsão).
+    """
+    tabela = pq.ParquetFile(arquivo).read_row_group(grupo)
+    df = pl.from_arrow(tabela)
+    df = df.rename({antigo: novo for antigo, novo in RENOMEAR.items() if antigo in df.columns})
+
+    # Dados brutos passam pela mesma limpeza do treino (modas/medianas gravadas em objects/limpeza.json)
+    artefatos = estado["registry"].artefatos
+    df = artefatos.limpar(df)
+    # Linhas que continuam incompletas (ex.: categoria fora do vocabulário) saem com probabilidade
+    # e classe nulas, em vez de derrubar o row group inteiro
+    validas = df.select(pl.all_horizontal(pl.col(COLUNAS_MODELO).is_not_null())).to_series()
+    probabilidades = np.full(df.height, np.nan)
+    if validas.any():
+        probabilidades[validas.to_numpy()] = artefatos.prever(preparar_entrada(df.filter(validas))).reshape(-1)
+    resultado = resultados(probabilidades).select(pl.when(validas).then(pl.all()).name.keep())
+    identificador = (
+        df.select(coluna_id) if coluna_id
+        else pl.DataFrame({"linha": np.arange(inicio, inicio + df.height, dtype=np.int64)})
+    )
+    resultado = pl.concat([identificador, resultado], how="horizontal")
+
+    # Grava em arquivo temporário e renomeia: uma parte só existe se estiver completa
+    destino = os.path.join(saida, f"part-{indice:05d}.parquet")
+    resultado.write_parquet(f"{destino}.tmp")
+    os.replace(f"{destino}.tmp", destino)
+    return df.height, df.height - validas.sum()
+
+
+def row_groups(arquivos: list) -> list:
+    """(arquivo, row group, linha global de início) de cada row group, sem ler os dados."""
+    grupos, inicio = [], 0
+    for arquivo in arquivos:
+        metadados = pq.ParquetFile(arquivo).metadata
+        for g in range(metadados.num_row_groups):
+            grupos.append((arquivo, g, inicio))
+            inicio += metadados.row_group(g).num_rows
+    return grupos
+
+
+def run(entrada, saida: str, workers: int, coluna_id: str = None,
+        caminho_npz: str = "meu_modelo.npz", caminho_keras: str = "meu_modelo.keras",
+        diretorio_objetos: str = "objects") -> dict:
+    """`entrada`: um Parquet ou a lista de partes de um snapshot do feature store."""
+    os.makedirs(saida, exist_ok=True)
+    arquivos = [entrada] if isinstance(entrada, str) else list(entrada)
+    grupos = row_groups(arquivos)
+
+    pendentes = [
+        indice for indice in range(len(grupos))
+        if not os.path.exists(os.path.join(saida, f"part-{indice:05d}.parquet"))
+    ]
+    ja_feitos = len(grupos) - len(pendentes)
+    if ja_feitos:
+        print(f"♻️ Retomando: {ja_feitos} de {len(grupos)} partes já pontuadas")
+
+    print(f"🚀 Pontuando {len(pendentes)} row groups de {len(arquivos)} arquivo(s) com {workers} processos...")
+    inicio = time.perf_counter()
+    linhas, sem_previsao, falhas = 0, 0, {}
+    # spawn: quem chama run() (um notebook, o pipeline) pode já ter usado os pools de threads do
+    # Polars/PyArrow, que não sobrevivem a um fork; mesma escolha do explicar_lote
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"), initializer=iniciar_worker,
+                             initargs=(caminho_npz, caminho_keras, diretorio_objetos)) as pool:
+        futuros = {
+            pool.submit(pontuar_grupo, *grupos[indice][:2], indice, grupos[indice][2], saida, coluna_id): indice
+            for indice in pendentes
+        }
+        for futuro in as_completed(futuros):
+            grupo = futuros[futuro]
+            try:
+                pontuadas, incompletas = futuro.result()
+                linhas += pontuadas
+                sem_previsao += incompletas
+            except Exception as e:
+                falhas[grupo] = str(e)
+                print(f"❌ Row group {grupo}: {e}")
+
+    duracao = time.perf_counter() - inicio
+    taxa = linhas / duracao if duracao > 0 else 0.0
+    print(f"✅ {linhas} linhas em {duracao:.1f}s ({taxa:,.0f} linhas/s). Resultado em {saida}/")
+    if sem_previsao:
+        print(f"⚠️ {sem_previsao} linhas sem previsão (dados incompletos mesmo depois da limpeza)")
+    if falhas:
+        print(f"⚠️ {len(falhas)} row groups falharam; rode de novo para tentar apenas eles")
+    return {"linhas": linhas, "sem_previsao": sem_previsao, "segundos": duracao, "linhas_por_segundo": taxa,
+            "falhas": falhas}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pontuação em massa de pedidos a partir de um Parquet")
+    parser.add_argument("entrada", nargs="?", default="data/raw/base_treinamento.parquet",
+                        help="Parquet de entrada (padrão: data/raw/base_treinamento.parquet)")
+    parser.add_argument("saida", help="Diretório de saída (part-*.parquet com probabilidade e classe)")
+    parser.add_argument("--snapshot", default=None,
+                        help="Pontua um snapshot do feature store em vez do arquivo de entrada (nome ou nome@versao)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos no pool")
+    parser.add_argument("--id", dest="coluna_id", default=None,
+                        help="Coluna de identificação copiada para a saída (padrão: número da linha)")
+    args = parser.parse_args()
+
+    entrada = args.entrada
+    if args.snapshot:
+        nome, _, versao = args.snapshot.partition("@")
+        entrada = arquivos_snapshot(nome, versao or None)
+    resumo = run(entrada, args.saida, args.workers, args.coluna_id)
+    raise SystemExit(1 if resumo["falhas"] else 0)
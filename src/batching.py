@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+def dono_predict(predict_fn):
+    """
+    Objeto que identifica o modelo de um predict_fn. `artefatos.predict` cria um método ligado
+    novo a cada acesso, então comparar a função em si separaria cada requisição em um lote;
+    o que importa é a foto de artefatos (`__self__`) a que ele pertence.
+    """
+    return getattr(predict_fn, "__self__", predict_fn)
+
+
+class MicroBatcher:
+    """
+    Agrupa requisições concorrentes em um único forward pass do modelo.
+
+    Cada chamada a `submit` entra em uma fila; uma thread de fundo espera até
+    `janela_ms` milissegundos (ou até juntar `max_batch_size` linhas), roda
+    `predict_fn` uma única vez no lote concatenado e devolve a fatia de cada
+    chamador através de um Future.
+
+    Um `predict_fn` por chamada (o modelo da foto de artefatos usada no
+    pré-processamento) substitui o padrão; só chamadas do mesmo dono dividem
+    um lote (ver dono_predict).
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 64, janela_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.janela = janela_ms / 1000.0
+        self._fila = queue.Queue()
+        # Item retirado da fila que pertence a outro predict_fn: abre o próximo lote
+        self._adiado = None
+        self._ativo = True
+        self._lock = threading.Lock()
+        # Métricas
+        self.total_lotes = 0
+        self.total_linhas = 0
+        self.maior_lote = 0
+        self.histograma_lotes = {}
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, X, predict_fn=None) -> Future:
+        if not self._ativo:
+            raise RuntimeError("MicroBatcher encerrado")
+        futuro = Future()
+        self._fila.put((np.asarray(X), futuro, predict_fn or self.predict_fn))
+        return futuro
+
+    def predict(self, X, timeout: float = None, predict_fn=None):
+        return self.submit(X, predict_fn).result(timeout=timeout)
+
+    def close(self):
+        self._ativo = False
+        self._fila.put(None)
+        self._thread.join()
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                'fila': self._fila.qsize(),
+                'lotes': self.total_lotes,
+                'linhas': self.total_linhas,
+                'tamanho_medio_lote': self.total_linhas / self.total_lotes if self.total_lotes else 0.0,
+                'maior_lote': self.maior_lote,
+                'histograma_lotes': dict(sorted(self.histograma_lotes.items())),
+                'max_batch_size': self.max_batch_size,
+                'janela_ms': self.janela * 1000.0,
+            }
+
+    def _coletar_lote(self, primeiro) -> list:
+        lote = [primeiro]
+        linhas = len(primeiro[0])
+        prazo = time.monotonic() + self.janela
+        while linhas < self.max_batch_size:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                item = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            if item is None:
+                # Sinal de encerramento: processa o que já temos e devolve o sinal à fila
+                self._fila.put(None)
+                break
+            if dono_predict(item[2]) is not dono_predict(primeiro[2]):
+                # Artefatos recarregados no meio da janela: o modelo novo fica para o próximo lote
+                self._adiado = item
+                break
+            lote.append(item)
+            linhas += len(item[0])
+        return lote
+
+    def _registrar(self, linhas: int):
+        # Histograma em potências de 2 (1, 2, 4, 8, ...)
+        faixa = 1 << max(linhas - 1, 0).bit_length()
+        with self._lock:
+            self.total_lotes += 1
+            self.total_linhas += linhas
+            self.maior_lote = max(self.maior_lote, linhas)
+            self.histograma_lotes[faixa] = self.histograma_lotes.get(faixa, 0) + 1
+
+    def _loop(self):
+        while True:
+            primeiro, self._adiado = self._adiado, None
+            if primeiro is None:
+                primeiro = self._fila.get()
+            if primeiro is None:
+                break
+            lote = self._coletar_lote(primeiro)
+            futuros = [futuro for _, futuro, _ in lote]
+            try:
+                X = np.concatenate([x for x, _, _ in lote], axis=0)
+                saida = np.asarray(primeiro[2](X))
+                self._registrar(len(X))
+                # Devolve a cada chamador exatamente as linhas que ele enviou
+                cortes = np.cumsum([len(x) for x, _, _ in lote])[:-1]
+                for futuro, parte in zip(futuros, np.split(saida, cortes)):
+                    futuro.set_result(parte)
+            except Exception as e:
+                for futuro in futuros:
+                    if not futuro.done():
+                        futuro.set_exception(e)
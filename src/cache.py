@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import polars as pl
+
+from src.const import COLUNAS_MODELO
+from src.metrics import SEM_CRONOMETRO
+from src.registry import preparar_entrada
+
+SEPARADOR = "\x1f"
+NULO = "\x00"
+
+
+def chaves_previsao(df: pl.DataFrame, versao: str = "") -> list:
+    """
+    Uma chave estável por linha: hash das 13 colunas do modelo já normalizadas
+    (numéricas em Float64 e proporcaosolicitadototal calculada), prefixado pela
+    versão dos artefatos. "5000", 5000 e 5000.0 geram a mesma chave.
+    """
+    texto = df.select(
+        pl.concat_str(
+            [pl.col(c).cast(pl.String).fill_null(NULO) for c in COLUNAS_MODELO], separator=SEPARADOR
+        ).alias("chave")
+    ).get_column("chave")
+    return [f"{versao}:{hashlib.blake2b(t.encode(), digest_size=16).hexdigest()}" for t in texto]
+
+
+class BackendMemoria:
+    """
+    Backend compartilhado de referência (dicionário no próprio processo).
+    Serve de substituto local para o Redis em testes e desenvolvimento.
+    """
+
+    def __init__(self):
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chaves: list) -> dict:
+        agora = time.monotonic()
+        with self._lock:
+            return {
+                k: self._dados[k][0] for k in chaves
+                if k in self._dados and self._dados[k][1] > agora
+            }
+
+    def guardar(self, valores: dict, ttl: float):
+        expira = time.monotonic() + ttl
+        with self._lock:
+            self._dados.update({k: (v, expira) for k, v in valores.items()})
+
+
+class BackendRedis:
+    """Backend compartilhado entre processos/máquinas (requer o pacote `redis`)."""
+
+    def __init__(self, url: str, prefixo: str = "previsao:"):
+        import redis  # Import tardio: só é necessário se CACHE_REDIS_URL estiver definido
+        self.cliente = redis.Redis.from_url(url)
+        self.prefixo = prefixo
+
+    def obter(self, chaves: list) -> dict:
+        valores = self.cliente.mget([self.prefixo + k for k in chaves])
+        return {k: float(v) for k, v in zip(chaves, valores) if v is not None}
+
+    def guardar(self, valores: dict, ttl: float):
+        pipe = self.cliente.pipeline(transaction=False)
+        for k, v in valores.items():
+            pipe.set(self.prefixo + k, repr(float(v)), px=int(ttl * 1000))
+        pipe.execute()
+
+
+class CachePrevisoes:
+    """
+    Cache LRU com expiração (TTL) das probabilidades já calculadas, por cliente.
+
+    A chave de cada linha inclui a versão da foto de artefatos que faz a previsão
+    (ArtefatosPreprocessamento.assinatura, recebida em `prever`): probabilidades de
+    um modelo nunca são guardadas sob a versão de outro. Quando a versão muda, o
+    cache local é esvaziado e as entradas antigas do backend deixam de ser encontradas.
+    """
+
+    def __init__(self, capacidade: int = 10_000, ttl: float = 300.0, backend=None):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self.backend = backend
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {"acertos": 0, "falhas": 0, "acertos_backend": 0, "despejos": 0,
+                            "expirados": 0, "invalidacoes": 0}
+        self._assinatura = None
+
+    def versao(self, assinatura) -> str:
+        """Versão das chaves para a foto de artefatos com essa assinatura."""
+        if assinatura != self._assinatura:
+            with self._lock:
+                if assinatura != self._assinatura:
+                    if self._assinatura is not None:
+                        self._dados.clear()
+                        self._contadores["invalidacoes"] += 1
+                    self._assinatura = assinatura
+        return hashlib.blake2b(repr(assinatura).encode(), digest_size=8).hexdigest()
+
+    def obter(self, chaves: list) -> dict:
+        agora = time.monotonic()
+        encontrados = {}
+        with self._lock:
+            for k in chaves:
+                item = self._dados.get(k)
+                if item is None:
+                    continue
+                if item[1] <= agora:
+                    del self._dados[k]
+                    self._contadores["expirados"] += 1
+                    continue
+                self._dados.move_to_end(k)
+                encontrados[k] = item[0]
+
+        faltando = [k for k in chaves if k not in encontrados]
+        if faltando and self.backend is not None:
+            try:
+                do_backend = self.backend.obter(faltando)
+            except Exception as e:
+                # Backend fora do ar não derruba a previsão: seguimos só com o cache local
+                print(f"⚠️ Falha ao consultar o cache compartilhado: {e}")
+                do_backend = {}
+            self._guardar_local(do_backend)
+            encontrados.update(do_backend)
+
+        with self._lock:
+            self._contadores["acertos"] += len(encontrados)
+            self._contadores["acertos_backend"] += len(encontrados) - (len(chaves) - len(faltando))
+            self._contadores["falhas"] += len(chaves) - len(encontrados)
+        return encontrados
+
+    def _guardar_local(self, valores: dict):
+        if not valores:
+            return
+        expira = time.monotonic() + self.ttl
+        with self._lock:
+            for k, v in valores.items():
+                self._dados[k] = (v, expira)
+                self._dados.move_to_end(k)
+            while len(self._dados) > self.capacidade:
+                self._dados.popitem(last=False)
+                self._contadores["despejos"] += 1
+
+    def guardar(self, valores: dict):
+        self._guardar_local(valores)
+        if self.backend is not None:
+            try:
+                self.backend.guardar(valores, self.ttl)
+            except Exception as e:
+                print(f"⚠️ Falha ao gravar no cache compartilhado: {e}")
+
+    def prever(self, batch, pontuar, assinatura, etapa=None) -> np.ndarray:
+        """
+        Devolve as probabilidades de todas as linhas de `batch`, chamando
+        `pontuar(df)` apenas para as linhas que não estão no cache. `assinatura`
+        é a da foto de artefatos que `pontuar` usa (a mesma nas duas pontas).
+        `etapa` (ex.: MetricasServico.etapa) cronometra a preparação da entrada
+        e a consulta ao cache, para que os erros delas caiam em alguma etapa.
+        """
+        etapa = etapa or (lambda nome: SEM_CRONOMETRO)
+        with etapa('entrada'):
+            df = preparar_entrada(batch)
+        with etapa('cache'):
+            chaves = chaves_previsao(df, self.versao(assinatura))
+            encontrados = self.obter(chaves)
+
+        probabilidades = np.empty(df.height, dtype=np.float64)
+        faltando = []
+        for i, k in enumerate(chaves):
+            if k in encontrados:
+                probabilidades[i] = encontrados[k]
+            else:
+                faltando.append(i)
+
+        if faltando:
+            novos = np.asarray(pontuar(df[faltando]), dtype=np.float64).reshape(-1)
+            probabilidades[faltando] = novos
+            self.guardar({chaves[i]: float(p) for i, p in zip(faltando, novos)})
+        return probabilidades
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def metricas(self) -> dict:
+        with self._lock:
+            tamanho = len(self._dados)
+            contadores = dict(self._contadores)
+        consultas = contadores["acertos"] + contadores["falhas"]
+        return {
+            **contadores,
+            "tamanho": tamanho,
+            "capacidade": self.capacidade,
+            "ttl": self.ttl,
+            "taxa_acerto": contadores["acertos"] / consultas if consultas else 0.0,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+        }
@@ -1,4 +1,5 @@
 # src/const.py
+import polars as pl
 
 QUERY_TREINAMENTO = """
 SELECT c.Profissao,
@@ -23,4 +24,83 @@ JOIN ProdutosFinanciados pf ON pc.ProdutoID = pf.ProdutoID
 LEFT JOIN ParcelasCredito p ON pc.SolicitacaoID = p.SolicitacaoID
 WHERE pc.Status = 'Aprovado'
 GROUP BY c.ClienteID, pf.NomeComercial, pc.ValorSolicitado, pc.ValorTotalBem
-"""
\ No newline at end of file
+"""
+
+# Mesma base do criar_dataset.gerar_base_ia, mas com a agregação das parcelas feita no banco:
+# só a contagem de 'Vencido' por solicitação sai do Postgres, nunca a tabela inteira
+QUERY_BASE_IA = """
+SELECT pc.solicitacaoid,
+       c.profissao, c.tempoprofissao, c.renda, c.tiporesidencia, c.escolaridade, c.score,
+       c.datanascimento, c.dependentes, c.estadocivil,
+       pf.nomecomercial,
+       pc.valorsolicitado, pc.valortotalbem,
+       CASE WHEN COALESCE(v.qtd_vencidos, 0) > 0 THEN 'ruim' ELSE 'bom' END AS classe
+FROM pedidocredito pc
+JOIN clientes c ON pc.clienteid = c.clienteid
+JOIN produtosfinanciados pf ON pc.produtoid = pf.produtoid
+LEFT JOIN (
+    SELECT solicitacaoid, COUNT(*) FILTER (WHERE status = 'Vencido') AS qtd_vencidos
+    FROM parcelascredito
+    GROUP BY solicitacaoid
+) v ON pc.solicitacaoid = v.solicitacaoid
+WHERE pc.status = 'Aprovado'
+"""
+
+# Classe (bom/ruim) por solicitação, agregada no Postgres: só solicitacaoid e classe trafegam
+QUERY_ALVO = """
+SELECT solicitacaoid,
+       CASE WHEN COUNT(*) FILTER (WHERE status = 'Vencido') > 0 THEN 'ruim' ELSE 'bom' END AS classe
+FROM parcelascredito
+GROUP BY solicitacaoid
+"""
+
+# Colunas de entrada do modelo, na ordem EXATA usada no treino (X.columns)
+COLUNAS_MODELO = [
+    'profissao', 'tempoprofissao', 'renda', 'tiporesidencia', 'escolaridade', 'score',
+    'idade', 'dependentes', 'estadocivil', 'produto', 'valorsolicitado', 'valortotalbem',
+    'proporcaosolicitadototal'
+]
+
+# Layout do data/raw/base_treinamento.parquet (criar_dataset.py) -> nomes esperados pelo modelo
+RENOMEAR = {
+    "nomecomercial": "produto",
+    "valor_solicitado": "valorsolicitado",
+    "valor_total_bem": "valortotalbem",
+}
+
+COL_NUMERICAS = ['tempoprofissao', 'renda', 'idade', 'dependentes',
+                 'valorsolicitado', 'valortotalbem', 'proporcaosolicitadototal']
+COL_CATEGORICAS = ['profissao', 'tiporesidencia', 'escolaridade', 'score', 'estadocivil', 'produto']
+
+
+# Vocabulários das colunas categóricas, em ordem alfabética (a mesma das classes do LabelEncoder).
+# Fonte única para a correção de digitação, os tipos Enum, o webapp e a codificação.
+PROFISSOES_VALIDAS = ['Advogado', 'Arquiteto', 'Cientista de Dados', 'Contador', 'Dentista',
+                      'Empresário', 'Engenheiro', 'Médico', 'Programador']
+TIPOS_RESIDENCIA_VALIDOS = ['Alugada', 'Outros', 'Própria']
+ESCOLARIDADES_VALIDAS = ['Ens.Fundamental', 'Ens.Médio', 'PósouMais', 'Superior']
+SCORES_VALIDOS = ['Baixo', 'Bom', 'Justo', 'MuitoBom']
+ESTADOS_CIVIS_VALIDOS = ['Casado', 'Divorciado', 'Solteiro', 'Víuvo']
+PRODUTOS_VALIDOS = ['AgileXplorer', 'DoubleDuty', 'EcoPrestige', 'ElegantCruise', 'SpeedFury',
+                    'TrailConqueror', 'VoyageRoamer', 'WorkMaster']
+
+VOCABULARIOS = {
+    'profissao': PROFISSOES_VALIDAS,
+    'tiporesidencia': TIPOS_RESIDENCIA_VALIDOS,
+    'escolaridade': ESCOLARIDADES_VALIDAS,
+    'score': SCORES_VALIDOS,
+    'estadocivil': ESTADOS_CIVIS_VALIDOS,
+    'produto': PRODUTOS_VALIDOS,
+}
+# Vocabulário fixo: o código físico do Enum (UInt8) é o próprio código do LabelEncoder
+TIPOS_CATEGORICOS = {coluna: pl.Enum(vocabulario) for coluna, vocabulario in VOCABULARIOS.items()}
+
+# Colunas que passam pela correção de digitação: todas as que viram Enum, para que
+# nenhum valor fora do vocabulário (ex.: "Propria") chegue ao cast de tipar_categoricas
+VALORES_VALIDOS = dict(VOCABULARIOS)
+
+# Faixas aceitas por coluna; fora delas o valor é trocado pela mediana (tratar_outliers_lazy)
+LIMITES_OUTLIERS = {
+    'tempoprofissao': (0, 70),
+    'idade': (0, 110),
+}
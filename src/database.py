@@ -1,5 +1,10 @@
 import polars as pl
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from urllib.parse import quote_plus  # <--- Adicione esta importação
 from dotenv import load_dotenv
 
@@ -19,7 +24,226 @@ def get_db_connection():
     db_url = f"postgresql://{user}:{password_encoded}@{host}:{port}/{dbname}"
     return db_url
 
-def execute_query(query: str):
-    uri = get_db_connection()
-    # Adicionando uma configuração extra para o driver ADBC
-    return pl.read_database_uri(query=query, uri=uri, engine="adbc")
\ No newline at end of file
+def conectar_adbc(uri: str):
+    from adbc_driver_postgresql import dbapi
+    # autocommit: só lemos, e uma conexão parada no pool não deve segurar uma transação aberta
+    return dbapi.connect(uri, autocommit=True)
+
+
+class PoolConexoes:
+    """
+    Pool de conexões ADBC reaproveitadas entre as queries.
+
+    - `minimo` conexões são abertas na criação e mantidas abertas;
+    - no máximo `maximo` conexões existem ao mesmo tempo: quem pede além disso
+      espera até `timeout` segundos por uma devolvida;
+    - uma conexão parada há mais de `verificar_apos` segundos passa por um
+      `SELECT 1` antes de ser entregue; se falhar, é descartada e reaberta;
+    - uma conexão descartada na devolução (erro e sem resposta ao `SELECT 1`)
+      é reposta até voltar ao `minimo`.
+
+    Uso: `with pool.conexao() as conn: ...` (a conexão volta ao pool na saída).
+    """
+
+    def __init__(self, uri: str = None, minimo: int = 1, maximo: int = 4, timeout: float = 30.0,
+                 verificar_apos: float = 30.0, conectar=conectar_adbc):
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError(f"Tamanho de pool inválido: minimo={minimo}, maximo={maximo}")
+        self.uri = uri or get_db_connection()
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout = timeout
+        self.verificar_apos = verificar_apos
+        self._conectar = conectar
+        # LIFO: a conexão usada por último (a "mais quente") sai primeiro
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(maximo)
+        self._lock = threading.Lock()
+        self._abertas = 0
+        self._fechado = False
+        for _ in range(minimo):
+            self._livres.put((self._abrir(), time.monotonic()))
+
+    def _abrir(self):
+        conn = self._conectar(self.uri)
+        with self._lock:
+            self._abertas += 1
+        return conn
+
+    def _descartar(self, conn):
+        with self._lock:
+            self._abertas -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _repor(self):
+        """Reabre conexões até voltar ao `minimo`; se o banco não responder, só avisa (a próxima query tenta)."""
+        while not self._fechado:
+            with self._lock:
+                if self._abertas >= self.minimo:
+                    return
+                # Reservada antes de conectar: duas devoluções ao mesmo tempo não passam do mínimo
+                self._abertas += 1
+            try:
+                conn = self._conectar(self.uri)
+            except Exception as e:
+                with self._lock:
+                    self._abertas -= 1
+                print(f"⚠️ Não foi possível repor a conexão descartada do pool: {e}")
+                return
+            self._livres.put((conn, time.monotonic()))
+
+    def _saudavel(self, conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def _obter(self):
+        if self._fechado:
+            raise RuntimeError("Pool de conexões fechado")
+        if not self._vagas.acquire(timeout=self.timeout):
+            raise TimeoutError(f"Nenhuma conexão livre em {self.timeout}s (maximo={self.maximo})")
+        try:
+            try:
+                conn, devolvida_em = self._livres.get_nowait()
+            except queue.Empty:
+                return self._abrir()
+            if time.monotonic() - devolvida_em > self.verificar_apos and not self._saudavel(conn):
+                print("⚠️ Conexão inválida descartada do pool; abrindo outra")
+                self._descartar(conn)
+                return self._abrir()
+            return conn
+        except Exception:
+            self._vagas.release()
+            raise
+
+    def _devolver(self, conn, com_erro: bool):
+        try:
+            # Depois de um erro (ou de um stream interrompido) só reaproveitamos a conexão se ela responder
+            if self._fechado:
+                self._descartar(conn)
+            elif com_erro and not self._saudavel(conn):
+                self._descartar(conn)
+                self._repor()
+            else:
+                self._livres.put((conn, time.monotonic()))
+        finally:
+            self._vagas.release()
+
+    @contextmanager
+    def conexao(self):
+        conn = self._obter()
+        com_erro = False
+        try:
+            yield conn
+        except BaseException:
+            com_erro = True
+            raise
+        finally:
+            self._devolver(conn, com_erro)
+
+    def fechar(self):
+        """Fecha as conexões livres; as que estiverem em uso são fechadas ao serem devolvidas."""
+        self._fechado = True
+        while True:
+            try:
+                conn, _ = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+
+    def metricas(self) -> dict:
+        livres = self._livres.qsize()
+        return {"abertas": self._abertas, "livres": livres, "em_uso": self._abertas - livres,
+                "minimo": self.minimo, "maximo": self.maximo}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool() -> PoolConexoes:
+    """Pool compartilhado do processo (DB_POOL_MIN / DB_POOL_MAX no .env), criado no primeiro uso."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._fechado:
+            _pool = PoolConexoes(
+                minimo=int(os.getenv('DB_POOL_MIN', '1')),
+                maximo=int(os.getenv('DB_POOL_MAX', '4')),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            )
+        return _pool
+
+
+def consultar(conn, query: str) -> pl.DataFrame:
+    # Mesmo caminho do read_database_uri(engine="adbc"): resultado inteiro como tabela Arrow
+    with conn.cursor() as cur:
+        cur.execute(query)
+        return pl.from_arrow(cur.fetch_arrow_table())
+
+
+def execute_query(query: str, pool: PoolConexoes = None):
+    with (pool or obter_pool()).conexao() as conn:
+        return consultar(conn, query)
+
+
+def _query_cronometrada(query: str, pool: PoolConexoes) -> tuple:
+    inicio = time.perf_counter()
+    df = execute_query(query, pool)
+    return df, time.perf_counter() - inicio
+
+
+def executar_consultas(queries: dict, pool: PoolConexoes = None, max_paralelo: int = None,
+                       tempos: dict = None) -> dict:
+    """
+    Roda queries independentes ao mesmo tempo, cada uma em uma conexão do pool
+    (no máximo `max_paralelo` de uma vez, limitado ao tamanho do pool).
+    Recebe {nome: query} e devolve {nome: DataFrame} na mesma ordem; se `tempos`
+    for passado, recebe os segundos de cada query.
+    """
+    pool = pool or obter_pool()
+    max_paralelo = min(max_paralelo or pool.maximo, pool.maximo, max(len(queries), 1))
+    with ThreadPoolExecutor(max_paralelo) as executor:
+        futuros = {nome: executor.submit(_query_cronometrada, query, pool) for nome, query in queries.items()}
+        resultados = {}
+        for nome, futuro in futuros.items():
+            resultados[nome], segundos = futuro.result()
+            if tempos is not None:
+                tempos[nome] = segundos
+        return resultados
+
+def execute_query_stream(query: str, tamanho_lote: int = 100_000, hint_bytes: int = 16 * 1024 * 1024):
+    """
+    Versão em streaming do execute_query: em vez de carregar o resultado
+    inteiro, gera DataFrames Polars de no máximo `tamanho_lote` linhas,
+    lidos do cursor ADBC como record batches Arrow.
+    """
+    from adbc_driver_postgresql import StatementOptions
+
+    # A conexão fica presa ao gerador até o último lote (ou até ele ser fechado)
+    with obter_pool().conexao() as conn:
+        with conn.cursor() as cur:
+            # Tamanho aproximado de cada batch que o driver monta a partir do COPY
+            cur.adbc_statement.set_options(**{StatementOptions.BATCH_SIZE_HINT_BYTES.value: str(hint_bytes)})
+            cur.execute(query)
+            reader = cur.fetch_record_batch()
+            vazio = True
+            for batch in reader:
+                for inicio in range(0, batch.num_rows, tamanho_lote):
+                    vazio = False
+                    yield pl.from_arrow(batch.slice(inicio, tamanho_lote))
+            if vazio:
+                # Resultado sem linhas: devolvemos ao menos o schema
+                yield pl.from_arrow(reader.schema.empty_table())
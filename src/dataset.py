@@ -0,0 +1,126 @@
+import polars as pl
+import pyarrow.parquet as pq
+
+from src.const import QUERY_ALVO, QUERY_BASE_IA
+from src.database import execute_query, executar_consultas
+from src.incremental import ler_tabela, ler_alvo, arquivos_tabela, ALVO
+from src.processing import calcular_idade, categorizar, limpar_moeda
+
+# Colunas que a base de treinamento realmente usa de cada tabela (projeção)
+COLUNAS_NECESSARIAS = {
+    "clientes": ["clienteid", "profissao", "tempoprofissao", "renda", "tiporesidencia", "escolaridade",
+                 "score", "datanascimento", "dependentes", "estadocivil"],
+    "pedidocredito": ["solicitacaoid", "clienteid", "produtoid", "status", "valorsolicitado", "valortotalbem"],
+    "produtosfinanciados": ["produtoid", "nomecomercial"],
+    ALVO: ["solicitacaoid", "classe"],
+}
+
+COLUNAS_FINAIS = [
+    "profissao", "tempoprofissao", "renda", "tiporesidencia",
+    "escolaridade", "score", "idade", "dependentes",
+    "estadocivil", "nomecomercial", "valor_solicitado",
+    "valor_total_bem", "classe"
+]
+COLUNAS_CATEGORICAS_BASE = ["profissao", "tiporesidencia", "escolaridade", "score", "estadocivil", "nomecomercial"]
+
+
+def finalizar_base(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Transformações finais comuns às duas estratégias (idade, moeda e ordem das linhas)."""
+    return (
+        lf.with_columns([
+            calcular_idade(pl.col("datanascimento")).alias("idade"),
+            limpar_moeda(pl.col("valorsolicitado")).alias("valor_solicitado"),
+            limpar_moeda(pl.col("valortotalbem")).alias("valor_total_bem")
+        ])
+        .sort("solicitacaoid")
+        .select(COLUNAS_FINAIS)
+        # Texto repetido vira dicionário de códigos (ainda pode ter erro de digitação, por isso não Enum)
+        .pipe(categorizar, COLUNAS_CATEGORICAS_BASE)
+    )
+
+
+def bytes_parquet(arquivos: list, colunas: list) -> int:
+    """Bytes (comprimidos) que a leitura das `colunas` precisa tirar do disco."""
+    total = 0
+    for arquivo in arquivos:
+        metadados = pq.ParquetFile(arquivo).metadata
+        for g in range(metadados.num_row_groups):
+            grupo = metadados.row_group(g)
+            for c in range(grupo.num_columns):
+                coluna = grupo.column(c)
+                if coluna.path_in_schema in colunas:
+                    total += coluna.total_compressed_size
+    return total
+
+
+def construir_base_sql() -> tuple:
+    df = execute_query(QUERY_BASE_IA)
+    relatorio = {"sql": {"linhas": df.height, "bytes": df.estimated_size()}}
+    return finalizar_base(df.lazy()).collect(), relatorio
+
+def juntar_fontes(fontes: dict) -> pl.LazyFrame:
+    """Joins da base de treinamento a partir de um LazyFrame por fonte de COLUNAS_NECESSARIAS."""
+    return finalizar_base(
+        fontes["pedidocredito"]
+        .filter(pl.col("status") == "Aprovado")
+        .join(fontes["clientes"], on="clienteid")
+        .join(fontes["produtosfinanciados"], on="produtoid")
+        .join(fontes[ALVO], on="solicitacaoid", how="left")
+        # Se não tem parcela vencida e não está no alvo, consideramos 'bom'
+        .with_columns(pl.col("classe").fill_null("bom"))
+    )
+
+
+def construir_base_paralela(max_paralelo: int = None) -> tuple:
+    queries = {
+        tabela: f"SELECT {', '.join(colunas)} FROM {tabela}"
+        for tabela, colunas in COLUNAS_NECESSARIAS.items() if tabela != ALVO
+    }
+    # Filtro empurrado para o banco: só os pedidos aprovados entram na base
+    queries["pedidocredito"] += " WHERE status = 'Aprovado'"
+    queries[ALVO] = QUERY_ALVO
+
+    # Cada tabela em uma conexão do pool: o tempo total é o da mais lenta, não a soma
+    tempos = {}
+    fontes = executar_consultas(queries, max_paralelo=max_paralelo, tempos=tempos)
+    df = juntar_fontes({tabela: fonte.lazy() for tabela, fonte in fontes.items()}).collect()
+
+    relatorio = {
+        tabela: {"linhas": fonte.height, "bytes": fonte.estimated_size(), "segundos": tempos[tabela]}
+        for tabela, fonte in fontes.items()
+    }
+    return df, relatorio
+
+def construir_base_lazy(diretorio: str = "data/raw") -> tuple:
+    fontes = {
+        tabela: ler_tabela(tabela, diretorio, colunas=colunas) if tabela != ALVO else ler_alvo(diretorio)
+        for tabela, colunas in COLUNAS_NECESSARIAS.items()
+    }
+    df = juntar_fontes(fontes).collect(engine="streaming")
+
+    relatorio = {}
+    for tabela, colunas in COLUNAS_NECESSARIAS.items():
+        arquivos = arquivos_tabela(tabela, diretorio)
+        relatorio[tabela] = {
+            "linhas": sum(pq.ParquetFile(a).metadata.num_rows for a in arquivos),
+            "bytes": bytes_parquet(arquivos, colunas),
+        }
+    return df, relatorio
+
+ESTRATEGIAS = {
+    "sql": construir_base_sql,
+    "paralela": construir_base_paralela,
+    "lazy": construir_base_lazy,
+}
+
+def construir_base(estrategia: str = "sql", **kwargs) -> tuple:
+    """
+    Monta a base de treinamento (mesmo resultado nas duas estratégias):
+      - "sql":  agregação e joins empurrados para o Postgres (QUERY_BASE_IA)
+      - "paralela": as tabelas (só as colunas necessárias) buscadas ao mesmo tempo e unidas no Polars
+      - "lazy": LazyFrame sobre as fotos em Parquet de data/raw/, com projeção e filtros empurrados
+    Retorna (DataFrame, relatório com linhas e bytes lidos de cada fonte).
+    """
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estratégia desconhecida: {estrategia}. Use uma de {list(ESTRATEGIAS)}")
+    return ESTRATEGIAS[estrategia](**kwargs)
@@ -0,0 +1,108 @@
+import io
+import os
+import numpy as np
+
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+def _linear(x):
+    return x
+
+ATIVACOES = {
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'tanh': np.tanh,
+    'linear': _linear,
+}
+
+
+def exportar_pesos(caminho_keras: str = 'meu_modelo.keras', caminho_npz: str = 'meu_modelo.npz') -> str:
+    """
+    Extrai os pesos das camadas Dense do modelo Keras para um .npz compacto.
+    As camadas de Dropout são ignoradas, pois não atuam no model.predict.
+    """
+    import tensorflow as tf  # Só é necessário na exportação, nunca no serviço
+
+    model = tf.keras.models.load_model(caminho_keras)
+    pesos = {}
+    ativacoes = []
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.layers.Dropout):
+            continue
+        if not isinstance(layer, tf.keras.layers.Dense):
+            raise ValueError(f"Camada não suportada pelo motor NumPy: {type(layer).__name__}")
+
+        ativacao = layer.get_config()['activation']
+        if ativacao not in ATIVACOES:
+            raise ValueError(f"Ativação não suportada pelo motor NumPy: {ativacao}")
+
+        kernel, bias = layer.get_weights()
+        i = len(ativacoes)
+        pesos[f'W{i}'] = kernel.astype(np.float32)
+        pesos[f'b{i}'] = bias.astype(np.float32)
+        ativacoes.append(ativacao)
+
+    np.savez_compressed(caminho_npz, ativacoes=np.array(ativacoes), **pesos)
+    return caminho_npz
+
+
+def identificar_pesos(pesos_npz: bytes, caminho_npz: str, treino: str) -> str:
+    """Grava o .npz exportado acrescentando o identificador do treino, conferido na carga dos artefatos."""
+    with np.load(io.BytesIO(pesos_npz)) as dados:
+        arrays = {nome: dados[nome] for nome in dados.files}
+    with open(f"{caminho_npz}.tmp", "wb") as f:
+        np.savez_compressed(f, **arrays, treino=np.array(treino))
+    os.replace(f"{caminho_npz}.tmp", caminho_npz)
+    return caminho_npz
+
+
+class NumpyMLP:
+    """
+    Forward pass da rede Dense em NumPy puro (float32, como o Keras).
+    Expõe o mesmo `predict` do modelo Keras para ser usado no lugar dele.
+    """
+
+    def __init__(self, camadas: list, treino: str = None):
+        # camadas: lista de (kernel, bias, nome_da_ativacao)
+        self.camadas = [
+            (np.ascontiguousarray(W, dtype=np.float32), np.asarray(b, dtype=np.float32), ATIVACOES[a])
+            for W, b, a in camadas
+        ]
+        self.n_features = self.camadas[0][0].shape[0]
+        # Identificador do treino que publicou os pesos (ver identificar_pesos)
+        self.treino = treino
+
+    @classmethod
+    def load(cls, caminho_npz: str = 'meu_modelo.npz'):
+        with np.load(caminho_npz) as dados:
+            ativacoes = [str(a) for a in dados['ativacoes']]
+            camadas = [(dados[f'W{i}'], dados[f'b{i}'], a) for i, a in enumerate(ativacoes)]
+            treino = str(dados['treino']) if 'treino' in dados.files else None
+        return cls(camadas, treino)
+
+    def predict(self, X, verbose=0, batch_size=None) -> np.ndarray:
+        saida = np.asarray(X, dtype=np.float32)
+        if saida.ndim != 2 or saida.shape[1] != self.n_features:
+            raise ValueError(f"Esperado array (n, {self.n_features}), recebido {saida.shape}")
+        for W, b, ativacao in self.camadas:
+            saida = ativacao(saida @ W + b)
+        return saida
+
+    __call__ = predict
+
+
+def carregar_modelo(caminho_npz: str = 'meu_modelo.npz', caminho_keras: str = 'meu_modelo.keras'):
+    """
+    Usa o motor NumPy quando o .npz exportado existe; caso contrário
+    recorre ao TensorFlow (importado apenas neste caso).
+    """
+    if os.path.exists(caminho_npz):
+        return NumpyMLP.load(caminho_npz)
+
+    print(f"⚠️ {caminho_npz} não encontrado, carregando {caminho_keras} com TensorFlow")
+    import tensorflow as tf
+    return tf.keras.models.load_model(caminho_keras)
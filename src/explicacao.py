@@ -0,0 +1,129 @@
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import polars as pl
+
+from src.engine import NumpyMLP
+from src.training import ler_features
+
+CAMINHO_EXPLICACOES = "data/explicacoes/explicacoes.parquet"
+
+# Estado de cada processo do pool (estatísticas do LIME e modelo carregados uma única vez no initializer)
+estado = {}
+
+
+def criar_explainer(X_fundo, colunas: list, seed: int = 41, estatisticas: dict = None):
+    """
+    Com `estatisticas` (estatisticas_explainer), o LIME não recalcula quartis e frequências:
+    X_fundo só dá o número de colunas e pode ser uma única linha.
+    """
+    import lime.lime_tabular
+
+    return lime.lime_tabular.LimeTabularExplainer(
+        X_fundo, feature_names=list(colunas), class_names=['ruim', 'bom'],
+        mode='classification', random_state=seed, training_data_stats=estatisticas,
+    )
+
+
+def estatisticas_explainer(explainer) -> dict:
+    """training_data_stats do LIME (quartis, médias por faixa e frequências) de um explainer já montado."""
+    discretizer = explainer.discretizer
+    return {
+        "means": discretizer.means, "stds": discretizer.stds,
+        "mins": discretizer.mins, "maxs": discretizer.maxs,
+        # mins = [mínimo da base] + limites das faixas
+        "bins": {f: discretizer.mins[f][1:] for f in discretizer.to_discretize},
+        "feature_values": explainer.feature_values,
+        "feature_frequencies": explainer.feature_frequencies,
+    }
+
+
+def semente_linha(seed: int, identificador) -> int:
+    """Semente estável por id (inteiro, texto, ...): não depende da ordem nem da divisão entre processos."""
+    resumo = hashlib.blake2b(str(identificador).encode(), digest_size=4).digest()
+    return (seed + int.from_bytes(resumo, "little")) % 2 ** 32
+
+
+def iniciar_worker(caminho_features: str, caminho_npz: str, num_features: int, num_samples: int, seed: int,
+                   treino: str = None):
+    X_fundo, _, colunas = ler_features(caminho_features)
+    # A base de fundo é percorrida uma única vez; cada linha ganha um explainer leve com a própria semente
+    estado["estatisticas"] = estatisticas_explainer(criar_explainer(X_fundo, colunas, seed))
+    estado["fundo"] = X_fundo[:1]
+    estado["colunas"] = list(colunas)
+    estado["model"] = NumpyMLP.load(caminho_npz)
+    if estado["model"].treino != treino:
+        # O .npz foi republicado depois que X foi pré-processado no processo principal
+        raise ValueError(f"{caminho_npz} é do treino {estado['model'].treino}, esperado {treino}")
+    estado["num_features"] = num_features
+    estado["num_samples"] = num_samples
+    estado["seed"] = seed
+
+
+def probabilidades_lime(model):
+    def model_predict(data_asarray):
+        # Forward pass NumPy vetorizado sobre todas as amostras perturbadas de uma vez
+        predictions = model.predict(data_asarray)
+        # Formato exigido pelo LIME: [prob_classe_0, prob_classe_1]
+        return np.hstack((1 - predictions, predictions))
+    return model_predict
+
+
+def explicar_linhas(ids, X) -> list:
+    """Explica cada linha de X (no processo atual) e devolve registros no formato longo."""
+    model_predict = probabilidades_lime(estado["model"])
+    colunas = estado["colunas"]
+    registros = []
+    for identificador, linha in zip(ids, X):
+        # Semente por linha: o resultado não depende de como as linhas foram divididas entre os processos
+        explainer = criar_explainer(estado["fundo"], colunas, semente_linha(estado["seed"], identificador),
+                                    estado["estatisticas"])
+        exp = explainer.explain_instance(linha, model_predict, num_features=estado["num_features"],
+                                         num_samples=estado["num_samples"])
+        probabilidade = float(exp.predict_proba[1])
+        # as_list traz as condições ("renda > 0.71") na mesma ordem de as_map (índice, peso)
+        pares = zip(exp.as_map()[1], exp.as_list(label=1))
+        for posicao, ((indice, peso), (descricao, _)) in enumerate(pares):
+            registros.append({
+                "id": identificador.item() if isinstance(identificador, np.generic) else identificador,
+                "probabilidade": probabilidade, "posicao": posicao + 1,
+                "coluna": colunas[indice], "condicao": descricao, "peso": float(peso),
+                "intercepto": float(exp.intercept[1]), "r2_local": float(exp.score),
+            })
+    return registros
+
+
+def explicar_lote(X, ids=None, caminho_features: str = "data/features/treino.parquet",
+                  caminho_npz: str = "meu_modelo.npz", workers: int = None, num_features: int = 10,
+                  num_samples: int = 5000, seed: int = 41, tamanho_bloco: int = 64,
+                  treino: str = None) -> pl.DataFrame:
+    """
+    Explica várias linhas (já pré-processadas, nas colunas do plano de seleção)
+    em um pool de processos. Cada processo carrega o modelo (motor NumPy) e calcula
+    as estatísticas da base de fundo uma única vez; `treino` é o identificador esperado no .npz (o dos
+    artefatos que pré-processaram X). Retorna os pesos no formato longo:
+    id, probabilidade, posicao, coluna, condicao, peso, intercepto, r2_local.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    ids = np.arange(len(X)) if ids is None else np.asarray(ids)
+    workers = workers or os.cpu_count() or 1
+    blocos = [(ids[i:i + tamanho_bloco], X[i:i + tamanho_bloco]) for i in range(0, len(X), tamanho_bloco)]
+
+    inicio = time.perf_counter()
+    registros = []
+    # spawn: o processo principal já usou o pool de threads do Polars, que não sobrevive a um fork
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=iniciar_worker, initargs=(caminho_features, caminho_npz, num_features, num_samples, seed, treino)) as pool:
+        for parte in pool.map(explicar_linhas, *zip(*blocos)) if blocos else []:
+            registros.extend(parte)
+    duracao = time.perf_counter() - inicio
+    print(f"🔍 {len(X)} explicações em {duracao:.1f}s ({len(X) / duracao if duracao else 0:.1f} linhas/s, {workers} processos)")
+
+    # id no tipo da coluna de origem (--id pode ser texto); sem --id, o número da linha
+    schema = {"id": pl.Series(ids).dtype if len(ids) else pl.Int64, "probabilidade": pl.Float64, "posicao": pl.Int32, "coluna": pl.String,
+              "condicao": pl.String, "peso": pl.Float64, "intercepto": pl.Float64, "r2_local": pl.Float64}
+    return pl.DataFrame(registros, schema=schema)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import polars as pl
+
+DIRETORIO_FEATURE_STORE = "data/feature_store"
+# Escrito só pelo pipeline de treino (QUERY_TREINAMENTO): é a fonte de TREINO_FONTE=feature_store
+SNAPSHOT_TREINO = "treinamento"
+# Escrito pelo criar_dataset.py (uma linha por solicitação, idade por calcular_idade): outra definição
+# de base, então outro nome; serve para pontuar_lote/explicar_lote --snapshot base_ia
+SNAPSHOT_BASE_IA = "base_ia"
+LINHAS_POR_PARTE = 250_000
+
+
+def _hash_arquivo(caminho: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _schema(df) -> dict:
+    return {coluna: str(tipo) for coluna, tipo in df.schema.items()}
+
+
+def _gravar_json(caminho: str, dados: dict):
+    with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+    os.replace(f"{caminho}.tmp", caminho)
+
+
+def gravar_snapshot(df: pl.DataFrame, nome: str = SNAPSHOT_TREINO, diretorio: str = DIRETORIO_FEATURE_STORE,
+                    linhas_por_parte: int = LINHAS_POR_PARTE, origem: str = None) -> dict:
+    """
+    Grava `df` como uma nova versão de `nome`:
+      data/feature_store/<nome>/<versao>/part-00000.parquet ...  (zstd)
+      data/feature_store/<nome>/<versao>/manifesto.json          (schema, linhas, hash de cada parte)
+      data/feature_store/<nome>/atual.json                       (versão mais recente)
+    A versão é o hash do conteúdo: gravar os mesmos dados de novo não duplica nada.
+    Retorna o manifesto.
+    """
+    base = os.path.join(diretorio, nome)
+    os.makedirs(base, exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix=".gravando-", dir=base)
+    try:
+        partes = []
+        for i, inicio in enumerate(range(0, max(df.height, 1), linhas_por_parte)):
+            arquivo = f"part-{i:05d}.parquet"
+            parte = df.slice(inicio, linhas_por_parte)
+            parte.write_parquet(os.path.join(temporario, arquivo), compression="zstd", statistics=True)
+            partes.append({"arquivo": arquivo, "linhas": parte.height,
+                           "hash": _hash_arquivo(os.path.join(temporario, arquivo))})
+
+        schema = _schema(df)
+        conteudo = json.dumps({"schema": schema, "partes": [p["hash"] for p in partes]}, sort_keys=True)
+        hash_snapshot = hashlib.blake2b(conteudo.encode(), digest_size=16).hexdigest()
+        versao = hash_snapshot[:16]
+        manifesto = {
+            "nome": nome, "versao": versao, "hash": hash_snapshot,
+            "criado_em": datetime.now().isoformat(), "origem": origem,
+            "schema": schema, "linhas": df.height, "partes": partes,
+        }
+
+        destino = os.path.join(base, versao)
+        if os.path.exists(os.path.join(destino, "manifesto.json")):
+            manifesto = ler_manifesto(nome, versao, diretorio)
+            print(f"♻️ Feature store: {nome}@{versao} já existe ({manifesto['linhas']} linhas)")
+        else:
+            _gravar_json(os.path.join(temporario, "manifesto.json"), manifesto)
+            shutil.rmtree(destino, ignore_errors=True)
+            os.replace(temporario, destino)
+            print(f"🗄️ Feature store: {nome}@{versao} gravado ({df.height} linhas, {len(partes)} partes)")
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+
+    _gravar_json(os.path.join(base, "atual.json"), {"versao": versao})
+    return manifesto
+
+
+def versoes(nome: str = SNAPSHOT_TREINO, diretorio: str = DIRETORIO_FEATURE_STORE) -> list:
+    """Manifestos de todas as versões de `nome`, da mais antiga para a mais nova."""
+    base = os.path.join(diretorio, nome)
+    if not os.path.isdir(base):
+        return []
+    manifestos = [ler_manifesto(nome, v, diretorio) for v in os.listdir(base)
+                  if os.path.exists(os.path.join(base, v, "manifesto.json"))]
+    return sorted(manifestos, key=lambda m: m["criado_em"])
+
+
+def ler_manifesto(nome: str = SNAPSHOT_TREINO, versao: str = None,
+                  diretorio: str = DIRETORIO_FEATURE_STORE) -> dict:
+    if versao is None:
+        caminho_atual = os.path.join(diretorio, nome, "atual.json")
+        if not os.path.exists(caminho_atual):
+            raise FileNotFoundError(f"Nenhum snapshot '{nome}' em {diretorio}/ (rode criar_dataset.py ou um treino)")
+        with open(caminho_atual, encoding="utf-8") as f:
+            versao = json.load(f)["versao"]
+    caminho = os.path.join(diretorio, nome, versao, "manifesto.json")
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Snapshot {nome}@{versao} não encontrado em {diretorio}/")
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def arquivos_snapshot(nome: str = SNAPSHOT_TREINO, versao: str = None,
+                      diretorio: str = DIRETORIO_FEATURE_STORE) -> list:
+    manifesto = ler_manifesto(nome, versao, diretorio)
+    return [os.path.join(diretorio, nome, manifesto["versao"], p["arquivo"]) for p in manifesto["partes"]]
+
+
+def verificar_snapshot(nome: str = SNAPSHOT_TREINO, versao: str = None,
+                       diretorio: str = DIRETORIO_FEATURE_STORE) -> list:
+    """Recalcula o hash de cada parte; retorna as que não batem com o manifesto (vazio = íntegro)."""
+    manifesto = ler_manifesto(nome, versao, diretorio)
+    pasta = os.path.join(diretorio, nome, manifesto["versao"])
+    return [p["arquivo"] for p in manifesto["partes"]
+            if not os.path.exists(os.path.join(pasta, p["arquivo"]))
+            or _hash_arquivo(os.path.join(pasta, p["arquivo"])) != p["hash"]]
+
+
+def escanear_snapshot(nome: str = SNAPSHOT_TREINO, versao: str = None, colunas: list = None,
+                      diretorio: str = DIRETORIO_FEATURE_STORE) -> pl.LazyFrame:
+    """
+    LazyFrame sobre as partes da versão (a atual, se `versao` for None). O leitor
+    nativo do Polars mapeia os arquivos locais em memória e, com `colunas`, só
+    as colunas pedidas são lidas do disco.
+    """
+    manifesto = ler_manifesto(nome, versao, diretorio)
+    faltando = [c for c in (colunas or []) if c not in manifesto["schema"]]
+    if faltando:
+        raise ValueError(f"Colunas {faltando} não existem em {nome}@{manifesto['versao']}")
+    lf = pl.scan_parquet(arquivos_snapshot(nome, manifesto["versao"], diretorio))
+    return lf.select(colunas) if colunas else lf
+
+
+def ler_snapshot(nome: str = SNAPSHOT_TREINO, versao: str = None, colunas: list = None,
+                 diretorio: str = DIRETORIO_FEATURE_STORE, verificar: bool = False) -> pl.DataFrame:
+    """Lê a versão (projetando `colunas`) e confere linhas e tipos com o manifesto."""
+    manifesto = ler_manifesto(nome, versao, diretorio)
+    if verificar:
+        corrompidas = verificar_snapshot(nome, manifesto["versao"], diretorio)
+        if corrompidas:
+            raise ValueError(f"Partes com hash diferente do manifesto em {nome}@{manifesto['versao']}: {corrompidas}")
+
+    df = escanear_snapshot(nome, manifesto["versao"], colunas, diretorio).collect()
+    esperado = {c: t for c, t in manifesto["schema"].items() if c in df.columns}
+    if df.height != manifesto["linhas"] or _schema(df) != esperado:
+        raise ValueError(f"{nome}@{manifesto['versao']} não confere com o manifesto "
+                         f"(linhas {df.height} != {manifesto['linhas']} ou schema {_schema(df)} != {esperado})")
+    return df
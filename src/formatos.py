@@ -0,0 +1,76 @@
+import json
+import numpy as np
+import polars as pl
+
+TIPO_JSON = "application/json"
+TIPO_ARROW = "application/vnd.apache.arrow.stream"
+
+# Tipos aceitos no "schema" do formato colunar: nunca resolvemos nomes arbitrários do módulo polars
+TIPOS_SCHEMA = {
+    "Float64": pl.Float64, "Float32": pl.Float32,
+    "Int64": pl.Int64, "Int32": pl.Int32, "Int16": pl.Int16, "Int8": pl.Int8,
+    "UInt64": pl.UInt64, "UInt32": pl.UInt32, "UInt16": pl.UInt16, "UInt8": pl.UInt8,
+    "String": pl.String, "Utf8": pl.String, "Boolean": pl.Boolean,
+}
+
+
+def tipo_schema(tipo):
+    if not isinstance(tipo, str) or tipo not in TIPOS_SCHEMA:
+        raise ValueError(f"Tipo não suportado no schema: {tipo!r} (use um de {sorted(TIPOS_SCHEMA)})")
+    return TIPOS_SCHEMA[tipo]
+
+
+def ler_payload(corpo: bytes, content_type: str = TIPO_JSON) -> tuple:
+    """
+    Converte o corpo da requisição em um DataFrame Polars. Formatos aceitos:
+      - "arrow":   Arrow IPC (stream), para pontuação em massa;
+      - "colunas": JSON com schema tipado {"schema": {"renda": "Float64", ...}, "colunas": {"renda": [...], ...}};
+      - "linhas":  JSON dicionário de listas (formato do testeflask.py).
+    Retorna (DataFrame, formato).
+    """
+    if content_type and content_type.startswith(TIPO_ARROW):
+        return pl.read_ipc_stream(corpo), "arrow"
+
+    dados = json.loads(corpo)
+    if isinstance(dados, dict) and "colunas" in dados:
+        schema = {coluna: tipo_schema(tipo) for coluna, tipo in dados.get("schema", {}).items()}
+        return pl.DataFrame(dados["colunas"], schema_overrides=schema), "colunas"
+    return pl.DataFrame(dados), "linhas"
+
+
+def formato_resposta(formato_entrada: str, accept: str = "") -> str:
+    # Por padrão a resposta segue o formato da entrada; o header Accept pode pedir outro
+    if TIPO_ARROW in accept:
+        return "arrow"
+    if formato_entrada == "arrow" and "json" in accept:
+        return "colunas"
+    return formato_entrada
+
+
+def resultados(probabilidades) -> pl.DataFrame:
+    probabilidades = np.asarray(probabilidades, dtype=np.float64).reshape(-1)
+    return pl.DataFrame({
+        'probabilidade': probabilidades,
+        'classe': np.where(probabilidades > 0.5, 'bom', 'ruim'),
+    })
+
+
+def codificar_resposta(probabilidades, formato: str = "linhas") -> tuple:
+    """
+    Monta o corpo da resposta sem laço Python por linha. Retorna (bytes, content_type).
+      - "linhas":   {"status": "sucesso", "resultados": [{"probabilidade": ..., "classe": ...}, ...]}
+      - "colunas":  {"status": "sucesso", "resultados": {"probabilidade": [...], "classe": [...]}}
+      - "arrow":    Arrow IPC stream com as colunas probabilidade e classe
+    """
+    df = resultados(probabilidades)
+    if formato == "arrow":
+        return df.write_ipc_stream(None).getvalue(), TIPO_ARROW
+    if formato == "colunas":
+        corpo = json.dumps({
+            'status': 'sucesso',
+            'resultados': {'probabilidade': df['probabilidade'].to_list(), 'classe': df['classe'].to_list()},
+        })
+    else:
+        # write_json gera a lista de registros direto no Rust
+        corpo = '{"status": "sucesso", "resultados": ' + df.write_json() + '}'
+    return corpo.encode(), TIPO_JSON
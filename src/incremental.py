@@ -0,0 +1,254 @@
+import glob
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import polars as pl
+
+from src.database import execute_query_stream, obter_pool
+
+# Chave primária e coluna de watermark de cada tabela. O watermark traz as linhas
+# novas; as alterações em linhas já extraídas (cliente editado, parcela que passou
+# a 'Vencido') são detectadas pelo hash de cada linha calculado no Postgres: só
+# (chave, hash) trafega e apenas as que mudaram são buscadas por inteiro. A cada
+# atualização só as "janela" linhas mais recentes abaixo do watermark são
+# conferidas (padrão JANELA_CONFERENCIA), para o custo não crescer com o
+# histórico; a conferência da tabela inteira é opcional (conferencia_completa).
+# Se a tabela tiver uma coluna de data de atualização, ela deve ser o watermark
+# (traz as linhas novas e as alteradas) e a conferência pode ser desligada
+# ("conferir": False).
+# "propagar" lista colunas do delta que outras etapas precisam (as solicitações
+# cujas parcelas mudaram).
+TABELAS_INCREMENTAIS = {
+    "clientes": {"chave": ["clienteid"], "watermark": "clienteid"},
+    "pedidocredito": {"chave": ["solicitacaoid"], "watermark": "solicitacaoid"},
+    "parcelascredito": {"chave": ["parcelaid"], "watermark": "parcelaid", "propagar": ["solicitacaoid"]},
+    "produtosfinanciados": {"chave": ["produtoid"], "watermark": "produtoid"},
+}
+
+# Hash da linha inteira (bigint), gravado junto com cada versão da linha na foto local
+COLUNA_HASH = "_hash"
+EXPRESSAO_HASH = f"hashtextextended(t::text, 0) AS {COLUNA_HASH}"
+# Chaves por query ao buscar as linhas alteradas (WHERE chave IN (...))
+CHAVES_POR_CONSULTA = 10_000
+# Linhas mais recentes abaixo do watermark conferidas pelo hash em cada atualização
+JANELA_CONFERENCIA = 100_000
+
+ALVO = "alvo"  # Tabela derivada com a classe (bom/ruim) por solicitacaoid
+
+
+def _caminho_watermark(diretorio: str, tabela: str) -> str:
+    return os.path.join(diretorio, tabela, "_watermark.json")
+
+def ler_watermark(tabela: str, diretorio: str = "data/raw"):
+    caminho = _caminho_watermark(diretorio, tabela)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+def salvar_watermark(tabela: str, coluna: str, valor, diretorio: str = "data/raw"):
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    caminho = _caminho_watermark(diretorio, tabela)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"coluna": coluna, "valor": valor, "atualizado_em": datetime.now().isoformat()}, f)
+    # Troca atômica: o watermark só avança depois que os dados foram gravados
+    os.replace(temporario, caminho)
+
+def _literal_sql(valor) -> str:
+    if isinstance(valor, (int, float)):
+        return str(valor)
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def chave_tabela(tabela: str) -> list:
+    return ["solicitacaoid"] if tabela == ALVO else TABELAS_INCREMENTAIS[tabela]["chave"]
+
+def arquivos_tabela(tabela: str, diretorio: str = "data/raw") -> list:
+    # A ordem dos arquivos é a ordem de gravação: a última versão de cada chave vem por último
+    return sorted(glob.glob(os.path.join(diretorio, tabela, "part-*.parquet")))
+
+def ler_tabela(tabela: str, diretorio: str = "data/raw", chave: list = None, filtro: pl.Expr = None,
+               colunas: list = None) -> pl.LazyFrame:
+    """
+    Lê a foto local da tabela, mantendo apenas a versão mais recente de cada chave.
+    O `filtro` e as `colunas` são aplicados antes da deduplicação para serem
+    empurrados até a leitura do Parquet.
+    """
+    chave = chave or chave_tabela(tabela)
+    lf = pl.scan_parquet(arquivos_tabela(tabela, diretorio))
+    if colunas is not None:
+        lf = lf.select(list(dict.fromkeys(chave + colunas)))
+    if filtro is not None:
+        lf = lf.filter(filtro)
+    return lf.unique(subset=chave, keep="last", maintain_order=True)
+
+def _gravar_lotes(lotes, tabela: str, diretorio: str) -> list:
+    destino = os.path.join(diretorio, tabela)
+    os.makedirs(destino, exist_ok=True)
+    existentes = arquivos_tabela(tabela, diretorio)
+    proximo = int(os.path.basename(existentes[-1]).split("-")[1].split(".")[0]) + 1 if existentes else 0
+
+    novos = []
+    for lote in lotes:
+        if lote.height == 0:
+            continue
+        caminho = os.path.join(destino, f"part-{proximo:05d}.parquet")
+        lote.write_parquet(caminho)
+        novos.append(caminho)
+        proximo += 1
+    return novos
+
+def reiniciar_tabela(tabela: str, diretorio: str = "data/raw"):
+    """Apaga a foto local e o watermark: a próxima atualização será completa."""
+    for caminho in arquivos_tabela(tabela, diretorio):
+        os.remove(caminho)
+    if os.path.exists(_caminho_watermark(diretorio, tabela)):
+        os.remove(_caminho_watermark(diretorio, tabela))
+
+def compactar_tabela(tabela: str, diretorio: str = "data/raw", chave: list = None) -> bool:
+    """Reescreve a tabela em um único arquivo, descartando versões antigas das chaves."""
+    antigos = arquivos_tabela(tabela, diretorio)
+    if len(antigos) <= 1:
+        return False
+    temporario = os.path.join(diretorio, tabela, "compactado.tmp")
+    ler_tabela(tabela, diretorio, chave).sink_parquet(temporario)
+    # O compactado substitui a primeira parte antes de as outras serem apagadas: se o processo
+    # parar no meio, as partes restantes só repetem versões que já estão nele
+    os.replace(temporario, antigos[0])
+    for caminho in antigos[1:]:
+        os.remove(caminho)
+    return True
+
+
+def _tem_hash(tabela: str, diretorio: str) -> bool:
+    arquivos = arquivos_tabela(tabela, diretorio)
+    return not arquivos or COLUNA_HASH in pl.read_parquet_schema(arquivos[-1])
+
+def _chaves_alteradas(tabela: str, config: dict, watermark, diretorio: str, tamanho_lote: int,
+                      janela: int = None) -> list:
+    """
+    Chaves (até o watermark) cujo hash no banco difere do hash da versão local mais recente.
+    Com `janela`, só as `janela` linhas mais recentes abaixo do watermark são conferidas
+    (no banco e na foto local); sem ela, a tabela inteira.
+    """
+    chave, = config["chave"]
+    query = (f"SELECT t.{chave}, {EXPRESSAO_HASH} FROM {tabela} t "
+             f"WHERE t.{config['watermark']} <= {_literal_sql(watermark['valor'])}")
+    if janela is None:
+        lotes, filtro = execute_query_stream(query, tamanho_lote), None
+    else:
+        # O índice do watermark limita a leitura no banco; a janela cabe em memória
+        query += f" ORDER BY t.{config['watermark']} DESC LIMIT {int(janela)}"
+        lotes = [lote for lote in execute_query_stream(query, tamanho_lote) if lote.height]
+        if not lotes:
+            return []
+        filtro = pl.col(chave).is_in(pl.concat(lotes).get_column(chave).implode())
+    locais = ler_tabela(tabela, diretorio, filtro=filtro, colunas=[COLUNA_HASH]).collect()
+    alteradas = []
+    for lote in lotes:
+        lote = lote.with_columns(pl.col(chave).cast(locais.schema[chave]))
+        alteradas.extend(lote.join(locais, on=[chave, COLUNA_HASH], how="anti").get_column(chave).to_list())
+    return alteradas
+
+def _linhas_por_chave(tabela: str, chave: str, valores: list, tamanho_lote: int):
+    for inicio in range(0, len(valores), CHAVES_POR_CONSULTA):
+        lista = ", ".join(_literal_sql(v) for v in valores[inicio:inicio + CHAVES_POR_CONSULTA])
+        yield from execute_query_stream(
+            f"SELECT t.*, {EXPRESSAO_HASH} FROM {tabela} t WHERE t.{chave} IN ({lista})", tamanho_lote)
+
+
+def atualizar_tabela(tabela: str, diretorio: str = "data/raw", tamanho_lote: int = 100_000,
+                     conferencia_completa: bool = False) -> pl.DataFrame:
+    """
+    Acrescenta à foto local em Parquet as linhas com watermark maior que o último
+    salvo e, das linhas antigas mais recentes (ou de todas, com
+    `conferencia_completa`), as que mudaram no banco (hash diferente). Retorna
+    as chaves novas ou alteradas (e as colunas de "propagar" da configuração).
+    """
+    config = TABELAS_INCREMENTAIS.get(tabela)
+    if config is None:
+        raise ValueError(f"Tabela sem configuração incremental: {tabela}")
+    coluna = config["watermark"]
+    retorno = config["chave"] + config.get("propagar", [])
+
+    watermark = ler_watermark(tabela, diretorio)
+    if watermark is not None and not _tem_hash(tabela, diretorio):
+        print(f"⚠️ {tabela}: foto local sem o hash das linhas; refazendo a extração completa")
+        reiniciar_tabela(tabela, diretorio)
+        watermark = None
+
+    query = f"SELECT t.*, {EXPRESSAO_HASH} FROM {tabela} t"
+    if watermark is not None:
+        query += f" WHERE t.{coluna} > {_literal_sql(watermark['valor'])}"
+    novos = _gravar_lotes(execute_query_stream(query, tamanho_lote), tabela, diretorio)
+
+    alterados = []
+    if watermark is not None and config.get("conferir", True):
+        janela = None if conferencia_completa else config.get("janela", JANELA_CONFERENCIA)
+        chaves = _chaves_alteradas(tabela, config, watermark, diretorio, tamanho_lote, janela)
+        alterados = _gravar_lotes(_linhas_por_chave(tabela, config["chave"][0], chaves, tamanho_lote),
+                                  tabela, diretorio)
+
+    if not novos and not alterados:
+        return pl.DataFrame(schema={c: pl.Int64 for c in retorno})
+    if novos:
+        # Só as linhas novas movem o watermark (as alteradas estão todas abaixo dele)
+        maximo = pl.scan_parquet(novos).select(pl.col(coluna).max()).collect().item()
+        salvar_watermark(tabela, coluna, maximo, diretorio)
+    return pl.scan_parquet(novos + alterados).select(retorno).unique().collect()
+
+
+def atualizar_alvo(solicitacoes: pl.Series, diretorio: str = "data/raw") -> int:
+    """
+    Recalcula a classe (bom/ruim) somente das solicitações cujas parcelas
+    mudaram e grava o resultado como nova versão na tabela `alvo`.
+    """
+    if solicitacoes.len() == 0:
+        return 0
+    classes = (
+        ler_tabela("parcelascredito", diretorio, filtro=pl.col("solicitacaoid").is_in(solicitacoes))
+        .group_by("solicitacaoid")
+        .agg((pl.col("status") == "Vencido").sum().alias("qtd_vencidos"))
+        .with_columns(
+            pl.when(pl.col("qtd_vencidos") > 0).then(pl.lit("ruim")).otherwise(pl.lit("bom")).alias("classe")
+        )
+        .collect()
+    )
+    _gravar_lotes([classes], ALVO, diretorio)
+    return classes.height
+
+def atualizar_incremental(diretorio: str = "data/raw", tamanho_lote: int = 100_000,
+                          max_paralelo: int = 4, max_partes: int = 20,
+                          conferencia_completa: bool = False) -> dict:
+    """
+    Atualiza as quatro tabelas (até `max_paralelo` ao mesmo tempo, cada uma em
+    sua conexão do pool) e depois a classe. Tabelas com mais de `max_partes`
+    arquivos são compactadas. `conferencia_completa` confere o hash de todas as
+    linhas antigas, não só da janela (ex.: uma vez por semana). Retorna quantas
+    chaves mudaram em cada uma.
+    """
+    # Nunca mais threads do que conexões no pool: a extração de uma tabela grande segura a
+    # conexão por mais tempo que o DB_POOL_TIMEOUT e as threads excedentes desistiriam na espera
+    max_paralelo = min(max_paralelo, obter_pool().maximo)
+    with ThreadPoolExecutor(max_paralelo) as executor:
+        futuros = {
+            tabela: executor.submit(atualizar_tabela, tabela, diretorio, tamanho_lote, conferencia_completa)
+            for tabela in TABELAS_INCREMENTAIS
+        }
+        alterados = {tabela: futuro.result() for tabela, futuro in futuros.items()}
+
+    resumo = {tabela: delta.height for tabela, delta in alterados.items()}
+    resumo[ALVO] = atualizar_alvo(alterados["parcelascredito"]["solicitacaoid"].unique(), diretorio)
+
+    # Cada atualização acrescenta partes: de tempos em tempos ficamos só com a última versão de cada chave
+    for tabela in [*TABELAS_INCREMENTAIS, ALVO]:
+        partes = len(arquivos_tabela(tabela, diretorio))
+        if partes > max_partes and compactar_tabela(tabela, diretorio):
+            print(f"🗜️ {tabela}: {partes} partes compactadas em uma")
+    return resumo
+
+def ler_alvo(diretorio: str = "data/raw") -> pl.LazyFrame:
+    return ler_tabela(ALVO, diretorio).select("solicitacaoid", "classe")
@@ -0,0 +1,213 @@
+import bisect
+import hashlib
+import os
+import sys
+import threading
+import time
+
+# Faixas (em segundos) dos histogramas de duração, no estilo do cliente oficial do Prometheus
+FAIXAS_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Faixas do tamanho de lote (linhas por requisição): potências de 2, como o histograma do MicroBatcher
+FAIXAS_LINHAS = tuple(1 << i for i in range(17))
+
+
+def versao_curta(assinatura) -> str:
+    """Hash curto de uma assinatura (ex.: assinatura_diretorio) para usar como rótulo."""
+    return hashlib.blake2b(repr(assinatura).encode(), digest_size=6).hexdigest()
+
+
+class Histograma:
+    def __init__(self, faixas):
+        self.faixas = faixas
+        self.contagens = [0] * (len(faixas) + 1)  # última posição: +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.contagens[bisect.bisect_left(self.faixas, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def linhas_prometheus(self, nome: str, rotulos: str = "") -> list:
+        prefixo = f"{rotulos}," if rotulos else ""
+        linhas, acumulado = [], 0
+        for faixa, contagem in zip(self.faixas, self.contagens):
+            acumulado += contagem
+            linhas.append(f'{nome}_bucket{{{prefixo}le="{faixa:g}"}} {acumulado}')
+        linhas.append(f'{nome}_bucket{{{prefixo}le="+Inf"}} {self.total}')
+        sufixo = f"{{{rotulos}}}" if rotulos else ""
+        linhas.append(f"{nome}_sum{sufixo} {self.soma:.6f}")
+        linhas.append(f"{nome}_count{sufixo} {self.total}")
+        return linhas
+
+
+class _Cronometro:
+    __slots__ = ("metricas", "nome", "inicio")
+
+    def __init__(self, metricas, nome: str):
+        self.metricas = metricas
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        self.metricas.registrar_etapa(self.nome, time.perf_counter() - self.inicio, erro=tipo is not None)
+        return False
+
+
+class _SemCronometro:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        return False
+
+SEM_CRONOMETRO = _SemCronometro()
+
+
+class MetricasServico:
+    """
+    Instrumentação leve do caminho de previsão: duração e erros por etapa,
+    tamanho dos lotes, requisições por status e rótulos de versão.
+
+    Uso:
+        with metricas.etapa("modelo"):
+            ...
+    Uma exceção dentro do bloco conta como erro daquela etapa e segue adiante.
+    Com `habilitado=False`, `etapa` devolve um contexto vazio (custo desprezível).
+    """
+
+    def __init__(self, prefixo: str = "credito", habilitado: bool = True):
+        self.prefixo = prefixo
+        self.habilitado = habilitado
+        self._lock = threading.Lock()
+        self._etapas = {}
+        self._erros = {}
+        self._status = {}
+        self._lotes = Histograma(FAIXAS_LINHAS)
+        self._requisicoes = Histograma(FAIXAS_SEGUNDOS)
+
+    def etapa(self, nome: str):
+        return _Cronometro(self, nome) if self.habilitado else SEM_CRONOMETRO
+
+    def registrar_etapa(self, nome: str, segundos: float, erro: bool = False):
+        with self._lock:
+            if nome not in self._etapas:
+                self._etapas[nome] = Histograma(FAIXAS_SEGUNDOS)
+            self._etapas[nome].observar(segundos)
+            if erro:
+                self._erros[nome] = self._erros.get(nome, 0) + 1
+
+    def registrar_requisicao(self, status: int, segundos: float, linhas: int = 0):
+        if not self.habilitado:
+            return
+        with self._lock:
+            self._status[status] = self._status.get(status, 0) + 1
+            self._requisicoes.observar(segundos)
+            if linhas:
+                self._lotes.observar(linhas)
+
+    def prometheus(self, versoes: dict = None, batcher: dict = None, cache: dict = None) -> str:
+        """Formato texto do Prometheus (text/plain; version=0.0.4)."""
+        p = self.prefixo
+        linhas = []
+        if versoes:
+            rotulos = ",".join(f'{k}="{v}"' for k, v in versoes.items())
+            linhas += [f"# TYPE {p}_info gauge", f"{p}_info{{{rotulos}}} 1"]
+
+        with self._lock:
+            linhas.append(f"# TYPE {p}_etapa_segundos histogram")
+            for nome, histograma in sorted(self._etapas.items()):
+                linhas += histograma.linhas_prometheus(f"{p}_etapa_segundos", f'etapa="{nome}"')
+            linhas.append(f"# TYPE {p}_etapa_erros_total counter")
+            for nome in sorted(self._etapas):
+                linhas.append(f'{p}_etapa_erros_total{{etapa="{nome}"}} {self._erros.get(nome, 0)}')
+            linhas.append(f"# TYPE {p}_requisicoes_total counter")
+            for status, total in sorted(self._status.items()):
+                linhas.append(f'{p}_requisicoes_total{{status="{status}"}} {total}')
+            linhas.append(f"# TYPE {p}_requisicao_segundos histogram")
+            linhas += self._requisicoes.linhas_prometheus(f"{p}_requisicao_segundos")
+            linhas.append(f"# TYPE {p}_linhas_por_requisicao histogram")
+            linhas += self._lotes.linhas_prometheus(f"{p}_linhas_por_requisicao")
+
+        if batcher:
+            linhas += [
+                f"# TYPE {p}_batcher_fila gauge", f"{p}_batcher_fila {batcher['fila']}",
+                f"# TYPE {p}_batcher_lotes_total counter", f"{p}_batcher_lotes_total {batcher['lotes']}",
+                f"# TYPE {p}_batcher_linhas_total counter", f"{p}_batcher_linhas_total {batcher['linhas']}",
+                f"# TYPE {p}_batcher_maior_lote gauge", f"{p}_batcher_maior_lote {batcher['maior_lote']}",
+                f"# TYPE {p}_batcher_tamanho_lote histogram",
+            ]
+            # histograma_lotes do MicroBatcher já usa potências de 2: só acumulamos
+            acumulado = 0
+            for faixa, contagem in sorted(batcher['histograma_lotes'].items()):
+                acumulado += contagem
+                linhas.append(f'{p}_batcher_tamanho_lote_bucket{{le="{faixa}"}} {acumulado}')
+            linhas += [
+                f'{p}_batcher_tamanho_lote_bucket{{le="+Inf"}} {batcher["lotes"]}',
+                f"{p}_batcher_tamanho_lote_sum {batcher['linhas']}",
+                f"{p}_batcher_tamanho_lote_count {batcher['lotes']}",
+            ]
+
+        if cache:
+            for chave in ("acertos", "falhas", "acertos_backend", "despejos", "expirados", "invalidacoes"):
+                linhas += [f"# TYPE {p}_cache_{chave}_total counter", f"{p}_cache_{chave}_total {cache[chave]}"]
+            linhas += [f"# TYPE {p}_cache_tamanho gauge", f"{p}_cache_tamanho {cache['tamanho']}"]
+        return "\n".join(linhas) + "\n"
+
+
+class Perfilador:
+    """
+    Perfil por amostragem de uma requisição específica, ligado por header.
+    Uma thread à parte lê a pilha da thread da requisição a cada `intervalo`
+    segundos (sys._current_frames): a requisição não é instrumentada, ao
+    contrário do cProfile, que intercepta toda chamada de função.
+    Só funciona com habilitado=True; sem o header o custo é um `if`.
+    Os perfis ficam em `diretorio` no formato "pilhas dobradas" (uma pilha por
+    linha e o número de amostras), aberto pelo speedscope ou flamegraph.pl.
+    """
+
+    def __init__(self, diretorio: str = "perfis", habilitado: bool = False, intervalo: float = 0.001):
+        self.diretorio = diretorio
+        self.habilitado = habilitado
+        self.intervalo = intervalo
+        # Um perfil por vez no processo: a amostragem disputa o GIL com a requisição
+        self._lock = threading.Lock()
+
+    def _amostrar(self, alvo: int, parar: threading.Event, pilhas: dict):
+        while not parar.wait(self.intervalo):
+            frame = sys._current_frames().get(alvo)
+            quadros = []
+            while frame is not None:
+                codigo = frame.f_code
+                quadros.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                frame = frame.f_back
+            if quadros:
+                pilha = ";".join(reversed(quadros))
+                pilhas[pilha] = pilhas.get(pilha, 0) + 1
+
+    def executar(self, funcao, *args, **kwargs) -> tuple:
+        """Roda `funcao` sob amostragem. Retorna (resultado, caminho do perfil ou None se outro perfil já roda)."""
+        if not self._lock.acquire(blocking=False):
+            return funcao(*args, **kwargs), None
+        try:
+            pilhas, parar = {}, threading.Event()
+            amostrador = threading.Thread(target=self._amostrar, args=(threading.get_ident(), parar, pilhas),
+                                          daemon=True)
+            amostrador.start()
+            try:
+                resultado = funcao(*args, **kwargs)
+            finally:
+                parar.set()
+                amostrador.join()
+            os.makedirs(self.diretorio, exist_ok=True)
+            caminho = os.path.join(self.diretorio, f"perfil_{time.strftime('%Y%m%d_%H%M%S')}_{time.time_ns() % 10**9}.txt")
+            with open(caminho, "w") as f:
+                f.writelines(f"{pilha} {n}\n" for pilha, n in sorted(pilhas.items(), key=lambda x: -x[1]))
+            return resultado, caminho
+        finally:
+            self._lock.release()
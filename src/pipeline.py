@@ -0,0 +1,302 @@
+import ast
+import hashlib
+import inspect
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import joblib
+
+DIRETORIO_CACHE_PIPELINE = ".cache/pipeline"
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Constantes (ex.: COLUNAS_MODELO) entram na chave pelo valor
+TIPOS_CONSTANTES = (str, int, float, bool, type(None), tuple, list, dict, set, frozenset)
+
+
+def _do_projeto(objeto) -> bool:
+    try:
+        arquivo = inspect.getsourcefile(objeto)
+    except TypeError:
+        return False
+    if not arquivo:
+        return False
+    arquivo = os.path.abspath(arquivo)
+    return arquivo.startswith(RAIZ_PROJETO + os.sep) and "site-packages" not in arquivo
+
+
+def _nomes_globais(codigo) -> set:
+    # Nomes usados pela função e pelas funções aninhadas nela (closures, lambdas)
+    nomes = set(codigo.co_names)
+    for constante in codigo.co_consts:
+        if inspect.iscode(constante):
+            nomes |= _nomes_globais(constante)
+    return nomes
+
+
+def _imports_do_modulo(modulo) -> list:
+    """Módulos do projeto importados por `modulo` (import x / from x import y)."""
+    encontrados = []
+    for no in ast.walk(ast.parse(inspect.getsource(modulo))):
+        if isinstance(no, ast.Import):
+            nomes = [a.name for a in no.names]
+        elif isinstance(no, ast.ImportFrom):
+            base = no.module or ""
+            if no.level:
+                pacote = modulo.__name__.rsplit(".", no.level)[0]
+                base = f"{pacote}.{base}" if base else pacote
+            nomes = [base] + [f"{base}.{a.name}" for a in no.names]
+        else:
+            continue
+        encontrados.extend(sys.modules[n] for n in nomes if n in sys.modules and _do_projeto(sys.modules[n]))
+    return encontrados
+
+
+def _e_codigo(valor) -> bool:
+    return inspect.ismodule(valor) or inspect.isfunction(valor) or inspect.isclass(valor)
+
+
+def _repr_estavel(valor, pilha: list) -> str:
+    """repr de uma constante sem endereços de memória: funções dentro dela (ex.: ATIVACOES) viram o nome
+    e, se forem do projeto, entram na pilha de assinatura_codigo."""
+    if isinstance(valor, dict):
+        itens = sorted((_repr_estavel(k, pilha), _repr_estavel(v, pilha)) for k, v in valor.items())
+        return "{" + ", ".join(f"{k}: {v}" for k, v in itens) + "}"
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        itens = [_repr_estavel(v, pilha) for v in valor]
+        return f"{type(valor).__name__}[{', '.join(sorted(itens) if isinstance(valor, (set, frozenset)) else itens)}]"
+    if _e_codigo(valor):
+        if _do_projeto(valor):
+            pilha.append(valor)
+        return f"{getattr(valor, '__module__', '')}.{getattr(valor, '__qualname__', valor.__name__)}"
+    return repr(valor)
+
+
+def assinatura_codigo(funcao) -> str:
+    """
+    Código-fonte de `funcao` e de tudo do projeto que ela alcança: funções e
+    classes chamadas (seguidas uma a uma), módulos usados (fonte inteira e os
+    módulos do projeto que eles importam) e constantes globais pelo valor.
+    Bibliotecas de terceiros ficam de fora.
+    """
+    partes, vistos, pilha = {}, set(), [funcao]
+    while pilha:
+        objeto = pilha.pop()
+        if id(objeto) in vistos:
+            continue
+        vistos.add(id(objeto))
+
+        if inspect.ismodule(objeto):
+            partes[f"modulo:{objeto.__name__}"] = inspect.getsource(objeto)
+            pilha.extend(_imports_do_modulo(objeto))
+            continue
+
+        nome = f"{getattr(objeto, '__module__', '')}.{getattr(objeto, '__qualname__', '')}"
+        partes[nome] = inspect.getsource(objeto)
+        if inspect.isclass(objeto):
+            pilha.extend(base for base in objeto.__mro__[1:] if _do_projeto(base))
+            funcoes = [f for f in vars(objeto).values() if inspect.isfunction(f)]
+            funcoes += [f.__func__ for f in vars(objeto).values() if isinstance(f, (classmethod, staticmethod))]
+        else:
+            funcoes = [inspect.unwrap(objeto)]
+
+        for f in funcoes:
+            for global_ in sorted(_nomes_globais(f.__code__)):
+                if global_.startswith("__") or global_ not in f.__globals__:
+                    continue
+                valor = f.__globals__[global_]
+                if isinstance(valor, TIPOS_CONSTANTES):
+                    partes[f"{f.__module__}.{global_}"] = _repr_estavel(valor, pilha)
+                elif _e_codigo(valor) and _do_projeto(valor):
+                    pilha.append(valor)
+    return "\x1f".join(f"{k}\x1e{v}" for k, v in sorted(partes.items()))
+
+
+def assinatura_parametro(valor) -> str:
+    """Funções entram pelo código-fonte (mudar a arquitetura muda a chave); o resto por repr."""
+    if callable(valor):
+        if (inspect.isfunction(valor) or inspect.isclass(valor)) and _do_projeto(valor):
+            return assinatura_codigo(valor)
+        try:
+            return inspect.getsource(valor)
+        except (OSError, TypeError):
+            return f"{getattr(valor, '__module__', '')}.{getattr(valor, '__qualname__', repr(valor))}"
+    return repr(valor)
+
+
+def hash_bytes(dados: bytes) -> str:
+    return hashlib.blake2b(dados, digest_size=16).hexdigest()
+
+
+class Etapa:
+    """
+    Uma etapa do pipeline: `funcao(**saidas_das_dependencias, **parametros)`.
+    Etapas voláteis (ex.: extração do banco) sempre rodam; como a saída é
+    endereçada pelo conteúdo, as etapas seguintes continuam em cache se os
+    dados não mudaram. O código que entra na chave é o da função e de tudo
+    do projeto que ela chama (assinatura_codigo).
+    """
+
+    def __init__(self, nome: str, funcao, dependencias=(), parametros: dict = None, volatil: bool = False):
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = tuple(dependencias)
+        self.parametros = parametros or {}
+        self.volatil = volatil
+
+    def chave(self, hashes_dependencias: dict) -> str:
+        partes = [
+            self.nome,
+            assinatura_parametro(self.funcao),
+            json.dumps({k: assinatura_parametro(v) for k, v in sorted(self.parametros.items())}),
+            json.dumps({d: hashes_dependencias[d] for d in self.dependencias}),
+        ]
+        return hash_bytes("\x1f".join(partes).encode())
+
+
+class Resultados:
+    """Saídas do pipeline, carregadas do disco apenas quando acessadas."""
+
+    def __init__(self, pipeline, hashes: dict, em_memoria: dict, executadas: list, reaproveitadas: list):
+        self._pipeline = pipeline
+        self.hashes = hashes
+        self._em_memoria = em_memoria
+        self.executadas = executadas
+        self.reaproveitadas = reaproveitadas
+
+    def __getitem__(self, nome: str):
+        if nome not in self._em_memoria:
+            self._em_memoria[nome] = self._pipeline.carregar_objeto(self.hashes[nome])
+        return self._em_memoria[nome]
+
+
+class Pipeline:
+    """
+    DAG de etapas com cache em disco:
+      - .cache/pipeline/objetos/<hash da saída>.joblib   (conteúdo)
+      - .cache/pipeline/<etapa>/<chave>.json             (chave -> hash da saída)
+    A chave de uma etapa combina código, parâmetros e o hash das saídas de que
+    ela depende. Etapas em cache não são executadas (nem carregadas, se nada
+    depois delas precisar rodar); etapas independentes rodam em paralelo.
+    """
+
+    def __init__(self, etapas: list, diretorio: str = DIRETORIO_CACHE_PIPELINE, max_workers: int = None,
+                 offline: bool = False):
+        self.etapas = {e.nome: e for e in etapas}
+        self.diretorio = diretorio
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        # offline: etapas voláteis reaproveitam a última saída gravada (sem ir ao banco)
+        self.offline = offline
+
+    # --- Armazenamento ---
+    def _caminho_objeto(self, hash_saida: str) -> str:
+        return os.path.join(self.diretorio, "objetos", f"{hash_saida}.joblib")
+
+    def _caminho_indice(self, nome: str, chave: str) -> str:
+        return os.path.join(self.diretorio, nome, f"{chave}.json")
+
+    def _gravar_json(self, caminho: str, dados: dict):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(f"{caminho}.tmp", "w") as f:
+            json.dump(dados, f)
+        os.replace(f"{caminho}.tmp", caminho)
+
+    def _ler_json(self, caminho: str):
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho) as f:
+            return json.load(f)
+
+    def guardar_objeto(self, objeto) -> str:
+        buffer = io.BytesIO()
+        joblib.dump(objeto, buffer)
+        dados = buffer.getvalue()
+        hash_saida = hash_bytes(dados)
+        caminho = self._caminho_objeto(hash_saida)
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            with open(f"{caminho}.tmp", "wb") as f:
+                f.write(dados)
+            os.replace(f"{caminho}.tmp", caminho)
+        return hash_saida
+
+    def carregar_objeto(self, hash_saida: str):
+        return joblib.load(self._caminho_objeto(hash_saida))
+
+    def _em_cache(self, etapa: Etapa, chave: str):
+        if etapa.volatil:
+            indice = self._ler_json(os.path.join(self.diretorio, etapa.nome, "ultimo.json")) if self.offline else None
+        else:
+            indice = self._ler_json(self._caminho_indice(etapa.nome, chave))
+        if indice and os.path.exists(self._caminho_objeto(indice["saida"])):
+            return indice["saida"]
+        return None
+
+    # --- Execução ---
+    def _fechamento(self, alvos) -> list:
+        necessarias, pilha = [], list(alvos)
+        while pilha:
+            nome = pilha.pop()
+            if nome in necessarias:
+                continue
+            if nome not in self.etapas:
+                raise KeyError(f"Etapa desconhecida: {nome}")
+            necessarias.append(nome)
+            pilha.extend(self.etapas[nome].dependencias)
+        return necessarias
+
+    def _rodar(self, etapa: Etapa, chave: str, entradas: dict):
+        inicio = time.perf_counter()
+        saida = etapa.funcao(**entradas, **etapa.parametros)
+        hash_saida = self.guardar_objeto(saida)
+        registro = {"saida": hash_saida, "segundos": time.perf_counter() - inicio}
+        self._gravar_json(self._caminho_indice(etapa.nome, chave), registro)
+        if etapa.volatil:
+            self._gravar_json(os.path.join(self.diretorio, etapa.nome, "ultimo.json"), registro)
+        return saida, hash_saida, registro["segundos"]
+
+    def executar(self, alvos) -> Resultados:
+        alvos = [alvos] if isinstance(alvos, str) else list(alvos)
+        pendentes = set(self._fechamento(alvos))
+        hashes, em_memoria = {}, {}
+        executadas, reaproveitadas = [], []
+
+        def entrada(nome):
+            if nome not in em_memoria:
+                em_memoria[nome] = self.carregar_objeto(hashes[nome])
+            return em_memoria[nome]
+
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            rodando = {}
+            while pendentes or rodando:
+                # Etapas em cache liberam as seguintes na hora: resolvemos tudo o que der antes de esperar
+                prontas = True
+                while prontas:
+                    prontas = [n for n in sorted(pendentes) if all(d in hashes for d in self.etapas[n].dependencias)]
+                    for nome in prontas:
+                        pendentes.discard(nome)
+                        etapa = self.etapas[nome]
+                        chave = etapa.chave(hashes)
+                        em_cache = self._em_cache(etapa, chave)
+                        if em_cache:
+                            hashes[nome] = em_cache
+                            reaproveitadas.append(nome)
+                            print(f"⏭️ {nome}: em cache ({em_cache[:8]})")
+                            continue
+                        print(f"▶️ {nome}...")
+                        entradas = {d: entrada(d) for d in etapa.dependencias}
+                        rodando[pool.submit(self._rodar, etapa, chave, entradas)] = nome
+
+                if not rodando:
+                    break
+                concluidas, _ = wait(rodando, return_when=FIRST_COMPLETED)
+                for futuro in concluidas:
+                    nome = rodando.pop(futuro)
+                    saida, hash_saida, segundos = futuro.result()
+                    em_memoria[nome], hashes[nome] = saida, hash_saida
+                    executadas.append(nome)
+                    print(f"✅ {nome}: {segundos:.1f}s ({hash_saida[:8]})")
+
+        return Resultados(self, hashes, em_memoria, executadas, reaproveitadas)
@@ -0,0 +1,230 @@
+import glob
+import io
+import json
+import os
+import random as python_random
+import tempfile
+
+import numpy as np
+import polars as pl
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import classification_report, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from src.const import QUERY_TREINAMENTO, VALORES_VALIDOS, LIMITES_OUTLIERS, COLUNAS_MODELO
+from src.engine import NumpyMLP, exportar_pesos, identificar_pesos
+from src.explicacao import criar_explainer, probabilidades_lime
+from src.feature_store import SNAPSHOT_TREINO, gravar_snapshot, ler_manifesto, ler_snapshot
+from src.pipeline import Etapa, Pipeline, hash_bytes
+from src.preprocessador import Preprocessador, salvar_plano_selecao
+from src.processing import (CAMINHO_LIMPEZA, categorizar, estatisticas_limpeza, pipeline_limpeza,
+                            salvar_estatisticas_limpeza)
+from src.selection import SelecaoRFE
+from src.training import BATCH_SIZE_PADRAO, CAMINHO_FEATURES_TREINO, construir_modelo, salvar_features, treinar
+
+SEED = 41
+ALVOS_TREINO = ["avaliar", "estatisticas"]
+ARTEFATOS_LEGADOS = ["selector.joblib", "scaler_*.joblib", "label_encoder_*.joblib"]
+
+
+# --- Etapas: cada uma recebe as saídas das dependências com o nome da etapa ---
+def extrair(query: str):
+    from src.database import execute_query
+    # Categóricas como dicionário de códigos desde a extração (viram Enum no fim da limpeza)
+    return categorizar(execute_query(query))
+
+
+def limpar(extrair, valores_validos: dict, limites_outliers: dict):
+    # limpar_moeda → nulos → correção de digitação → outliers → feature_engineering (um único collect)
+    return pipeline_limpeza(extrair, valores_validos, limites_outliers)
+
+
+def estatisticas(limpar, limites_outliers: dict):
+    # Modas/medianas das features limpas: pontuar_lote/explicar_lote limpam dados brutos com elas
+    calculadas = estatisticas_limpeza(limpar.lazy().drop("classe", strict=False), {}, limites_outliers)
+    return {"nulos": calculadas["nulos"], "outliers": calculadas["outliers"], "limites": limites_outliers}
+
+
+def carregar_features(nome: str, versao: str):
+    # Substitui extrair + limpar: as features limpas vêm do feature store, sem banco
+    return ler_snapshot(nome, versao, verificar=True)
+
+
+def dividir(limpar, seed: int, test_size: float):
+    # Dividimos os índices das linhas: o mesmo sorteio do train_test_split, sem converter para pandas
+    y = limpar.get_column("classe").replace_strict({'ruim': 0, 'bom': 1}, return_dtype=pl.Int8).to_numpy()
+    idx_train, idx_test = train_test_split(np.arange(limpar.height), test_size=test_size, random_state=seed)
+    return {
+        "df_train": limpar[idx_train], "df_test": limpar[idx_test],
+        "y_train": y[idx_train], "y_test": y[idx_test],
+    }
+
+
+def ajustar(dividir):
+    # O preprocessador é ajustado SÓ no treino e reaplicado no teste.
+    # float32 (o dtype do modelo) desde aqui: nenhuma etapa seguinte precisa converter
+    preprocessador = Preprocessador().fit(dividir["df_train"])
+    return {
+        "preprocessador": preprocessador.to_dict(),
+        "X_train": preprocessador.transform(dividir["df_train"], dtype=np.float32),
+        "X_test": preprocessador.transform(dividir["df_test"], dtype=np.float32),
+    }
+
+
+def selecionar(ajustar, dividir, seed: int, n_atributos: int):
+    modelo = RandomForestClassifier(random_state=seed, n_jobs=-1)
+    mascara = SelecaoRFE(modelo).fit(ajustar["X_train"], dividir["y_train"]).suporte(n_atributos)
+    return {"mascara": mascara, "colunas": [c for c, manter in zip(COLUNAS_MODELO, mascara) if manter]}
+
+
+def matriz(ajustar, selecionar):
+    # A única cópia depois do transform: as colunas do plano em uma matriz float32 C-contígua,
+    # usada tal como está pelo treino, pela avaliação e pelo LIME
+    return {
+        "X_train": np.ascontiguousarray(ajustar["X_train"][:, selecionar["mascara"]]),
+        "X_test": np.ascontiguousarray(ajustar["X_test"][:, selecionar["mascara"]]),
+    }
+
+
+def treinar_modelo(matriz, dividir, construir_modelo, seed: int, batch_size: int):
+    import tensorflow as tf
+
+    np.random.seed(seed)
+    python_random.seed(seed)
+    tf.random.set_seed(seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = construir_modelo(matriz["X_train"].shape[1])
+        _, relatorio = treinar(model, matriz["X_train"], dividir["y_train"], batch_size=batch_size, seed=seed)
+
+        # Guardamos os arquivos (e não o objeto Keras): .keras para o TF e .npz para o motor NumPy
+        caminho_keras = os.path.join(tmp, "modelo.keras")
+        model.save(caminho_keras)
+        caminho_npz = exportar_pesos(caminho_keras, os.path.join(tmp, "modelo.npz"))
+        with open(caminho_keras, "rb") as f_keras, open(caminho_npz, "rb") as f_npz:
+            return {"keras": f_keras.read(), "npz": f_npz.read(), "relatorio": relatorio}
+
+
+def _modelo_numpy(treinar) -> NumpyMLP:
+    return NumpyMLP.load(io.BytesIO(treinar["npz"]))
+
+
+def avaliar(treinar, matriz, dividir):
+    model = _modelo_numpy(treinar)
+    probabilidades = model.predict(matriz["X_test"]).reshape(-1)
+    y_pred = (probabilidades > 0.5).astype(int)
+    return {
+        "auc": float(roc_auc_score(dividir["y_test"], probabilidades)),
+        "relatorio": classification_report(dividir["y_test"], y_pred, output_dict=True),
+        "texto": classification_report(dividir["y_test"], y_pred),
+    }
+
+
+def explicar(treinar, matriz, selecionar, indice: int, num_features: int, seed: int):
+    model = _modelo_numpy(treinar)
+    explainer = criar_explainer(matriz["X_train"], selecionar["colunas"], seed)
+    exp = explainer.explain_instance(matriz["X_test"][indice], probabilidades_lime(model),
+                                     num_features=num_features)
+    return {"pesos": exp.as_list(label=1), "html": exp.as_html()}
+
+
+def definir_pipeline(construir_modelo=construir_modelo, seed: int = SEED, n_atributos: int = 10,
+                     batch_size: int = BATCH_SIZE_PADRAO, query: str = QUERY_TREINAMENTO,
+                     indice_explicacao: int = 1, offline: bool = False, fonte: str = "banco",
+                     versao_features: str = None) -> Pipeline:
+    """
+    extrair → limpar → dividir → ajustar → selecionar → matriz → treinar → (avaliar | explicar)
+                     └→ estatisticas (modas/medianas para limpar dados novos)
+
+    Mudar só a arquitetura (`construir_modelo`) reaproveita tudo até `selecionar`;
+    avaliar e explicar rodam em paralelo. Com fonte="feature_store", `limpar` lê
+    a versão `versao_features` (ou a atual) do feature store e o banco não é usado.
+    """
+    if fonte == "feature_store":
+        # A versão resolvida entra na chave: um snapshot novo invalida as etapas seguintes
+        versao = ler_manifesto(SNAPSHOT_TREINO, versao_features)["versao"]
+        origem = [Etapa("limpar", carregar_features, parametros={"nome": SNAPSHOT_TREINO, "versao": versao})]
+    elif fonte == "banco":
+        origem = [
+            Etapa("extrair", extrair, parametros={"query": query}, volatil=True),
+            Etapa("limpar", limpar, ["extrair"],
+                  {"valores_validos": VALORES_VALIDOS, "limites_outliers": LIMITES_OUTLIERS}),
+        ]
+    else:
+        raise ValueError(f"Fonte desconhecida: {fonte}. Use 'banco' ou 'feature_store'")
+
+    return Pipeline([
+        *origem,
+        Etapa("estatisticas", estatisticas, ["limpar"], {"limites_outliers": LIMITES_OUTLIERS}),
+        Etapa("dividir", dividir, ["limpar"], {"seed": seed, "test_size": 0.2}),
+        Etapa("ajustar", ajustar, ["dividir"]),
+        Etapa("selecionar", selecionar, ["ajustar", "dividir"], {"seed": seed, "n_atributos": n_atributos}),
+        Etapa("matriz", matriz, ["ajustar", "selecionar"]),
+        Etapa("treinar", treinar_modelo, ["matriz", "dividir"],
+              {"construir_modelo": construir_modelo, "seed": seed, "batch_size": batch_size}),
+        Etapa("avaliar", avaliar, ["treinar", "matriz", "dividir"]),
+        Etapa("explicar", explicar, ["treinar", "matriz", "selecionar"],
+              {"indice": indice_explicacao, "num_features": 10, "seed": seed}),
+    ], offline=offline)
+
+
+def publicar(resultados, caminho_keras: str = "meu_modelo.keras", caminho_npz: str = "meu_modelo.npz",
+             diretorio_objetos: str = "objects"):
+    """Grava os artefatos usados pela API/webapp a partir das saídas (novas ou em cache) do pipeline."""
+    # Mesmo identificador em todos os artefatos: o registry recusa servir uma mistura de treinos
+    id_treino = hash_bytes("".join(
+        resultados.hashes[n] for n in ("estatisticas", "ajustar", "selecionar", "treinar")).encode())[:16]
+    preprocessador = Preprocessador.from_dict(resultados["ajustar"]["preprocessador"])
+    preprocessador.treino = id_treino
+    preprocessador.save(os.path.join(diretorio_objetos, "preprocessador.joblib"))
+    salvar_plano_selecao(resultados["selecionar"]["mascara"],
+                         caminho=os.path.join(diretorio_objetos, "plano_selecao.json"), treino=id_treino)
+    salvar_estatisticas_limpeza(resultados["estatisticas"],
+                                os.path.join(diretorio_objetos, os.path.basename(CAMINHO_LIMPEZA)), treino=id_treino)
+    # Base de fundo do LIME em lote (src/explicacao.py): treino já pré-processado, nas colunas do plano
+    salvar_features(resultados["matriz"]["X_train"], resultados["dividir"]["y_train"],
+                    resultados["selecionar"]["colunas"])
+    treino = resultados["treinar"]
+    with open(caminho_keras, "wb") as f:
+        f.write(treino["keras"])
+    identificar_pesos(treino["npz"], caminho_npz, id_treino)
+    # Formato antigo (um scaler/encoder por coluna e o RFE inteiro): já coberto por preprocessador.joblib
+    # e plano_selecao.json, e deixá-lo em objects/ só confunde quem inspeciona a pasta
+    for caminho in ARTEFATOS_LEGADOS:
+        for arquivo in glob.glob(os.path.join(diretorio_objetos, caminho)):
+            os.remove(arquivo)
+    with open(f"{os.path.splitext(caminho_keras)[0]}_treino.json", "w") as f:
+        json.dump(treino["relatorio"], f, indent=2)
+    print(f"📦 Artefatos publicados: {caminho_keras}, {caminho_npz}, {diretorio_objetos}/, {CAMINHO_FEATURES_TREINO}")
+
+
+def fonte_do_ambiente() -> str:
+    return os.getenv('TREINO_FONTE', 'banco')
+
+
+def pipeline_do_ambiente(construir_modelo=construir_modelo, **kwargs) -> Pipeline:
+    # TREINO_BATCH muda o tamanho do lote; PIPELINE_OFFLINE=1 reaproveita a última extração (sem banco);
+    # TREINO_FONTE=feature_store treina a partir do feature store (FEATURE_STORE_VERSAO fixa a versão)
+    return definir_pipeline(
+        construir_modelo,
+        batch_size=int(os.getenv('TREINO_BATCH', str(BATCH_SIZE_PADRAO))),
+        offline=os.getenv('PIPELINE_OFFLINE') == '1',
+        fonte=fonte_do_ambiente(),
+        versao_features=os.getenv('FEATURE_STORE_VERSAO') or None,
+        **kwargs,
+    )
+
+
+def rodar_treino(construir_modelo=construir_modelo, **kwargs):
+    """Usado por model_creation*.py: treina (ou reaproveita o cache), avalia e publica os artefatos."""
+    resultados = pipeline_do_ambiente(construir_modelo, **kwargs).executar(ALVOS_TREINO)
+    publicar(resultados)
+    if fonte_do_ambiente() == "banco":
+        # As features limpas desta extração viram uma versão do feature store (retreinos sem banco)
+        gravar_snapshot(resultados["limpar"], SNAPSHOT_TREINO, origem="pipeline_treino")
+
+    avaliacao = resultados["avaliar"]
+    print(f"\nAvaliação do Modelo nos Dados de Teste: AUC {avaliacao['auc']:.4f}")
+    print("\nRelatório de Classificação:")
+    print(avaliacao["texto"])
+    return resultados
@@ -0,0 +1,184 @@
+import json
+import os
+import joblib
+import numpy as np
+import polars as pl
+
+from src.const import COLUNAS_MODELO, COL_NUMERICAS, COL_CATEGORICAS
+
+VERSAO_FORMATO = 1
+CAMINHO_PREPROCESSADOR = "objects/preprocessador.joblib"
+CAMINHO_PLANO_SELECAO = "objects/plano_selecao.json"
+
+
+class Preprocessador:
+    """
+    Padronização (StandardScaler) das colunas numéricas e codificação
+    (LabelEncoder) das categóricas em um único objeto: ajustado uma vez no
+    treino com `fit` e reaplicado com `transform` no teste, na API, no webapp
+    e no XAI. Trabalha direto sobre colunas Polars/Arrow, sem passar por pandas.
+
+    `transform` devolve a matriz (float64, ou float32 para o modelo) com as
+    colunas na ordem do treino (COLUNAS_MODELO), com os mesmos valores da
+    antiga cadeia scaler/encoder.
+    """
+
+    def __init__(self, col_numericas: list = COL_NUMERICAS, col_categoricas: list = COL_CATEGORICAS,
+                 colunas: list = COLUNAS_MODELO):
+        self.col_numericas = list(col_numericas)
+        self.col_categoricas = list(col_categoricas)
+        self.colunas = list(colunas)
+        self.media = None
+        self.escala = None
+        self.classes = None
+        # Identificador do treino que publicou o artefato (o mesmo do plano de seleção e do modelo)
+        self.treino = None
+        self._tipos = {}
+
+    @property
+    def ajustado(self) -> bool:
+        return self.media is not None
+
+    def fit(self, df: pl.DataFrame):
+        df = pl.DataFrame(df) if not isinstance(df, pl.DataFrame) else df
+        estatisticas = df.select(
+            [pl.col(c).cast(pl.Float64).mean().alias(f"media__{c}") for c in self.col_numericas]
+            + [pl.col(c).cast(pl.Float64).std(ddof=0).alias(f"escala__{c}") for c in self.col_numericas]
+        ).row(0, named=True)
+        self.media = np.array([estatisticas[f"media__{c}"] for c in self.col_numericas])
+        escala = np.array([estatisticas[f"escala__{c}"] for c in self.col_numericas])
+        # Igual ao StandardScaler: variância ~zero não divide (escala 1)
+        self.escala = np.where(escala < 10 * np.finfo(np.float64).eps, 1.0, escala)
+        # Classes ordenadas, como o LabelEncoder (np.unique)
+        self.classes = {
+            c: np.array(sorted(df.get_column(c).drop_nulls().unique().cast(pl.String).to_list()), dtype=object)
+            for c in self.col_categoricas
+        }
+        self._tipos = {}
+        return self
+
+    def tipo(self, coluna: str) -> pl.Enum:
+        """Enum com as classes do ajuste: o código físico é o código do LabelEncoder."""
+        if coluna not in self._tipos:
+            self._tipos[coluna] = pl.Enum([str(c) for c in self.classes[coluna]])
+        return self._tipos[coluna]
+
+    def codificar(self, coluna: str, valores: pl.Series) -> np.ndarray:
+        if valores.null_count():
+            raise ValueError(f"Coluna '{coluna}' contém valores nulos")
+        tipo = self.tipo(coluna)
+        if valores.dtype != tipo:
+            # Texto (payload da API) ou outro vocabulário: conversão estrita para o Enum do ajuste
+            try:
+                valores = valores.cast(pl.String).cast(tipo)
+            except pl.exceptions.InvalidOperationError:
+                desconhecidos = sorted(set(valores.cast(pl.String).to_list()) - set(tipo.categories), key=str)
+                raise ValueError(f"y contains previously unseen labels: {desconhecidos} (coluna '{coluna}')") from None
+        # Já no Enum do ajuste (saída da limpeza): os códigos são lidos sem cópia
+        return valores.to_physical().to_numpy()
+
+    def transform(self, df, colunas: list = None, dtype=np.float64) -> np.ndarray:
+        """
+        Matriz C-contígua (`dtype`, padrão float64) com `colunas` nessa ordem
+        (padrão: todas, na ordem do treino). Colunas fora da lista não são
+        padronizadas nem codificadas.
+
+        A matriz é alocada uma vez e preenchida coluna a coluna: cada coluna
+        Polars é lida sem cópia (to_numpy de Float64 sem nulos / códigos do
+        Enum) e só a coluna padronizada é temporária. Com dtype=np.float32 o
+        resultado é igual a converter a matriz float64 depois.
+        """
+        if not self.ajustado:
+            raise RuntimeError("Preprocessador ainda não ajustado: chame fit() antes de transform()")
+        df = pl.DataFrame(df) if not isinstance(df, pl.DataFrame) else df
+        colunas = self.colunas if colunas is None else list(colunas)
+
+        matriz = np.empty((df.height, len(colunas)), dtype=dtype)
+        for i, coluna in enumerate(self.col_numericas):
+            if coluna in colunas:
+                valores = df.get_column(coluna).cast(pl.Float64).to_numpy()
+                matriz[:, colunas.index(coluna)] = (valores - self.media[i]) / self.escala[i]
+
+        for coluna in self.col_categoricas:
+            if coluna in colunas:
+                matriz[:, colunas.index(coluna)] = self.codificar(coluna, df.get_column(coluna))
+        return matriz
+
+    def fit_transform(self, df) -> np.ndarray:
+        return self.fit(df).transform(df)
+
+    # --- Persistência: um único arquivo versionado no lugar de 13 .joblib ---
+    def to_dict(self) -> dict:
+        return {
+            "versao": VERSAO_FORMATO,
+            "col_numericas": self.col_numericas,
+            "col_categoricas": self.col_categoricas,
+            "colunas": self.colunas,
+            "media": self.media,
+            "escala": self.escala,
+            "classes": self.classes,
+            "treino": self.treino,
+        }
+
+    def save(self, caminho: str = CAMINHO_PREPROCESSADOR) -> str:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        joblib.dump(self.to_dict(), caminho)
+        return caminho
+
+    @classmethod
+    def from_dict(cls, dados: dict):
+        if dados.get("versao") != VERSAO_FORMATO:
+            raise ValueError(f"Versão do preprocessador não suportada: {dados.get('versao')} (esperado {VERSAO_FORMATO})")
+        obj = cls(dados["col_numericas"], dados["col_categoricas"], dados["colunas"])
+        obj.media = np.asarray(dados["media"], dtype=np.float64)
+        obj.escala = np.asarray(dados["escala"], dtype=np.float64)
+        obj.classes = dados["classes"]
+        obj.treino = dados.get("treino")
+        return obj
+
+    @classmethod
+    def load(cls, caminho: str = CAMINHO_PREPROCESSADOR):
+        return cls.from_dict(joblib.load(caminho))
+
+    @classmethod
+    def from_legacy(cls, diretorio: str = "objects"):
+        """Monta o preprocessador a partir dos antigos scaler_*.joblib / label_encoder_*.joblib."""
+        obj = cls()
+        scalers = [joblib.load(os.path.join(diretorio, f"scaler_{c}.joblib")) for c in obj.col_numericas]
+        obj.media = np.concatenate([s.mean_ for s in scalers])
+        obj.escala = np.concatenate([s.scale_ for s in scalers])
+        obj.classes = {
+            c: joblib.load(os.path.join(diretorio, f"label_encoder_{c}.joblib")).classes_ for c in obj.col_categoricas
+        }
+        return obj
+
+
+# --- Plano de seleção: a máscara do RFE (support_) como lista de colunas ---
+def salvar_plano_selecao(mascara, colunas: list = COLUNAS_MODELO, caminho: str = CAMINHO_PLANO_SELECAO,
+                         treino: str = None) -> str:
+    """Grava as colunas escolhidas pelo seletor (RFE.get_support()), na ordem do treino."""
+    mascara = np.asarray(mascara, dtype=bool)
+    plano = {
+        "versao": VERSAO_FORMATO,
+        "treino": treino,
+        "colunas_treino": list(colunas),
+        "indices": np.flatnonzero(mascara).tolist(),
+        "colunas": [c for c, manter in zip(colunas, mascara) if manter],
+    }
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(plano, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def ler_plano_selecao(caminho: str = CAMINHO_PLANO_SELECAO) -> dict:
+    with open(caminho, encoding="utf-8") as f:
+        plano = json.load(f)
+    if plano.get("versao") != VERSAO_FORMATO:
+        raise ValueError(f"Versão do plano de seleção não suportada: {plano.get('versao')} (esperado {VERSAO_FORMATO})")
+    return plano
+
+
+def carregar_plano_selecao(caminho: str = CAMINHO_PLANO_SELECAO) -> list:
+    """Colunas selecionadas, na ordem em que o modelo as recebe."""
+    return ler_plano_selecao(caminho)["colunas"]
@@ -1,88 +1,185 @@
 import polars as pl
 from datetime import date
 from fuzzywuzzy import process
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-import joblib
+import json
 import os
 
+from src.const import COL_CATEGORICAS, TIPOS_CATEGORICOS
+
 # --- Funções de Tratamento e Pré-processamento ---
 def calcular_idade(col_nascimento):
     hoje = date.today()
     return (hoje.year - col_nascimento.dt.year())
 
 def limpar_moeda(coluna):
-    return (coluna.str.replace_all(r"[^0-9,]", "").str.replace(",", ".").cast(pl.Float64))
+    # Texto sem número ("abc", "") vira nulo e é preenchido como os demais nulos
+    return (coluna.str.replace_all(r"[^0-9,]", "").str.replace(",", ".").cast(pl.Float64, strict=False))
 
 
-def substituir_nulos(df: pl.DataFrame) -> pl.DataFrame:
-    expressoes = []
-    for coluna in df.columns:
-        if df[coluna].dtype == pl.String:
-            moda = df[coluna].mode()[0]
-            expressoes.append(pl.col(coluna).fill_null(moda))
-        else:
-            mediana = df[coluna].median()
-            expressoes.append(pl.col(coluna).fill_null(mediana))
-    return df.with_columns(expressoes)
+# Fora de objects/: o cache muda a cada correção nova e não pode disparar a recarga dos artefatos do serviço
+CAMINHO_CORRECOES = ".cache/correcoes_digitacao.json"
+
+def carregar_correcoes(caminho: str = CAMINHO_CORRECOES) -> dict:
+    if caminho and os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+def salvar_correcoes(correcoes: dict, caminho: str = CAMINHO_CORRECOES):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    # Um temporário por processo: workers do pontuar_lote podem gravar correções ao mesmo tempo
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(correcoes, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
 
-def corrigir_erros_digitacao(df: pl.DataFrame, coluna: str, lista_valida: list) -> pl.DataFrame:
+# Modas/medianas do treino, gravadas por publicar (src/pipeline_treino.py) para limpar dados novos
+CAMINHO_LIMPEZA = "objects/limpeza.json"
+VERSAO_LIMPEZA = 1
+
+def salvar_estatisticas_limpeza(estatisticas: dict, caminho: str = CAMINHO_LIMPEZA, treino: str = None) -> str:
+    dados = {"versao": VERSAO_LIMPEZA, "treino": treino, **estatisticas}
+    with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(f"{caminho}.tmp", caminho)
+    return caminho
+
+def carregar_estatisticas_limpeza(caminho: str = CAMINHO_LIMPEZA) -> dict:
+    with open(caminho, encoding="utf-8") as f:
+        dados = json.load(f)
+    if dados.get("versao") != VERSAO_LIMPEZA:
+        raise ValueError(f"Versão das estatísticas de limpeza não suportada: {dados.get('versao')} "
+                         f"(esperado {VERSAO_LIMPEZA})")
+    # JSON guarda os limites como listas
+    dados["limites"] = {c: tuple(faixa) for c, faixa in dados["limites"].items()}
+    return dados
+
+def mapa_correcoes(unicos: list, coluna: str, lista_valida: list,
+                   caminho_cache: str = CAMINHO_CORRECOES) -> dict:
     """
-    Corrige strings em uma coluna comparando-as com uma lista de valores válidos
-    usando similaridade de texto (FuzzyWuzzy).
+    Devolve {valor_errado: valor_corrigido} para os valores únicos da coluna
+    que não estão na lista válida. A busca (FuzzyWuzzy) só roda nos valores
+    ainda desconhecidos; as correções ficam guardadas em `caminho_cache`.
     """
-    def busca_correcao(valor):
-        # Se o valor for nulo ou já estiver na lista correta, não faz nada
-        if valor is None or valor in lista_valida:
-            return valor
-        
-        # Encontra a melhor correspondência na lista_valida
-        # extractOne retorna (valor, score), pegamos apenas o [0]
-        correcao = process.extractOne(str(valor), lista_valida)[0]
-        return correcao
+    cache = carregar_correcoes(caminho_cache) if caminho_cache else {}
+    entrada = cache.get(coluna, {})
+    # Se a lista de valores válidos mudou, as correções antigas não valem mais
+    if entrada.get("validos") != sorted(lista_valida):
+        entrada = {"validos": sorted(lista_valida), "correcoes": {}}
+    correcoes = entrada["correcoes"]
 
-    # Aplicamos a função na coluna escolhida
-    return df.with_columns(
-        pl.col(coluna).map_elements(busca_correcao, return_dtype=pl.String).alias(coluna)
-    )
+    validos = set(lista_valida)
+    errados = [valor for valor in unicos if valor is not None and valor not in validos]
 
-def tratar_outliers(df: pl.DataFrame, coluna: str, minimo: float, maximo: float) -> pl.DataFrame:
-    mediana = df.filter((pl.col(coluna) >= minimo) & (pl.col(coluna) <= maximo))[coluna].median()
-    return df.with_columns(
-        pl.when((pl.col(coluna) < minimo) | (pl.col(coluna) > maximo))
-        .then(mediana).otherwise(pl.col(coluna)).alias(coluna)
-    )
+    novos = [valor for valor in errados if valor not in correcoes]
+    for valor in novos:
+        # extractOne retorna (valor, score), pegamos apenas o [0]
+        correcoes[valor] = process.extractOne(str(valor), lista_valida)[0]
 
-def save_scalers(df: pl.DataFrame, colunas: list) -> pl.DataFrame:
-    os.makedirs("objects", exist_ok=True)
-    df_pd = df.to_pandas()
-    for col in colunas:
-        scaler = StandardScaler()
-        df_pd[col] = scaler.fit_transform(df_pd[[col]])
-        joblib.dump(scaler, f"objects/scaler_{col}.joblib")
-    return pl.from_pandas(df_pd)
-
-def save_encoders(df: pl.DataFrame, colunas: list) -> pl.DataFrame:
-    os.makedirs("objects", exist_ok=True)
-    df_pd = df.to_pandas()
-    for col in colunas:
-        le = LabelEncoder()
-        df_pd[col] = le.fit_transform(df_pd[col])
-        joblib.dump(le, f"objects/label_encoder_{col}.joblib")
-    return pl.from_pandas(df_pd)
+    if novos and caminho_cache:
+        cache[coluna] = entrada
+        salvar_correcoes(cache, caminho_cache)
+
+    return {valor: correcoes[valor] for valor in errados}
 
 def feature_engineering(df: pl.DataFrame) -> pl.DataFrame:
     return df.with_columns(
         (pl.col("valorsolicitado") / pl.col("valortotalbem")).alias("proporcaosolicitadototal")
     )
 
-def load_scalers(df, nomes_colunas):
-    for col in nomes_colunas:
-        scaler = joblib.load(f"objects/scaler_{col}.joblib")
-        df[col] = scaler.transform(df[[col]])
-    return df
-
-def load_encoders(df, nomes_colunas):
-    for col in nomes_colunas:
-        le = joblib.load(f"objects/label_encoder_{col}.joblib")
-        df[col] = le.transform(df[col])
-    return df
+# --- Pipeline de limpeza preguiçoso (LazyFrame) ---
+def estatisticas_limpeza(lf: pl.LazyFrame, valores_validos: dict, limites_outliers: dict) -> dict:
+    """
+    Calcula, em UMA única passada de agregação, tudo o que a limpeza precisa:
+    modas (texto) e medianas (demais colunas) para os nulos, medianas filtradas
+    para os outliers e valores únicos das colunas a corrigir.
+    """
+    schema = lf.collect_schema()
+    texto = {c for c, dtype in schema.items() if dtype in (pl.String, pl.Categorical) or isinstance(dtype, pl.Enum)}
+    expressoes = []
+    for coluna in schema:
+        if coluna in texto:
+            expressoes.append(pl.col(coluna).mode().first().cast(pl.String).alias(f"moda__{coluna}"))
+        else:
+            expressoes.append(pl.col(coluna).median().alias(f"mediana__{coluna}"))
+
+    for coluna, (minimo, maximo) in limites_outliers.items():
+        # A mediana filtrada é calculada depois do fill_null (mesma ordem das etapas)
+        preenchida = pl.col(coluna).fill_null(pl.col(coluna).median())
+        expressoes.append(
+            preenchida.filter(preenchida.is_between(minimo, maximo)).median().alias(f"outlier__{coluna}")
+        )
+
+    for coluna in valores_validos:
+        expressoes.append(pl.col(coluna).drop_nulls().unique().cast(pl.String).implode().alias(f"unicos__{coluna}"))
+
+    linha = lf.select(expressoes).collect().row(0, named=True)
+    return {
+        "nulos": {c: linha[f"moda__{c}"] if c in texto else linha[f"mediana__{c}"] for c in schema},
+        "outliers": {c: linha[f"outlier__{c}"] for c in limites_outliers},
+        "unicos": {c: linha[f"unicos__{c}"] for c in valores_validos},
+    }
+
+def substituir_nulos_lazy(lf: pl.LazyFrame, estatisticas: dict) -> pl.LazyFrame:
+    schema = lf.collect_schema()
+    # Coluna sem nenhum valor na base de referência não tem moda/mediana: os nulos ficam
+    return lf.with_columns([
+        pl.col(c).fill_null(valor) for c, valor in estatisticas["nulos"].items() if c in schema and valor is not None
+    ])
+
+def corrigir_erros_digitacao_lazy(lf: pl.LazyFrame, estatisticas: dict, valores_validos: dict,
+                                  caminho_cache: str = CAMINHO_CORRECOES) -> pl.LazyFrame:
+    expressoes = []
+    for coluna, lista_valida in valores_validos.items():
+        mapa = mapa_correcoes(estatisticas["unicos"][coluna], coluna, lista_valida, caminho_cache)
+        if mapa:
+            expressoes.append(pl.col(coluna).replace(mapa).alias(coluna))
+    return lf.with_columns(expressoes) if expressoes else lf
+
+def tratar_outliers_lazy(lf: pl.LazyFrame, estatisticas: dict, limites_outliers: dict) -> pl.LazyFrame:
+    return lf.with_columns([
+        pl.when((pl.col(c) < minimo) | (pl.col(c) > maximo))
+        .then(estatisticas["outliers"][c]).otherwise(pl.col(c)).alias(c)
+        for c, (minimo, maximo) in limites_outliers.items()
+    ])
+
+def categorizar(lf, colunas: list = COL_CATEGORICAS):
+    """Texto → Categorical (dicionário de códigos) já na extração, quando ainda pode haver erros de digitação."""
+    presentes = [c for c in colunas if c in lf.collect_schema()]
+    return lf.with_columns([pl.col(c).cast(pl.Categorical) for c in presentes])
+
+def tipar_categoricas(lf, tipos: dict = TIPOS_CATEGORICOS, estrito: bool = True):
+    """
+    Depois da limpeza os valores estão no vocabulário: Enum fixo. Com estrito=True falha se
+    aparecer valor fora dele; com estrito=False o valor vira nulo (a linha é descartada por quem pontua).
+    """
+    presentes = [c for c in tipos if c in lf.collect_schema()]
+    return lf.with_columns([pl.col(c).cast(pl.String).cast(tipos[c], strict=estrito) for c in presentes])
+
+def pipeline_limpeza(dados, valores_validos: dict, limites_outliers: dict,
+                     colunas_moeda: list = ("valorsolicitado", "valortotalbem"),
+                     streaming: bool = False, estatisticas: dict = None) -> pl.DataFrame:
+    """
+    limpar_moeda → nulos → correção de digitação → outliers → feature_engineering,
+    em LazyFrame: uma passada para as estatísticas e um único collect no final. As colunas
+    categóricas saem como Enum (TIPOS_CATEGORICOS).
+
+    `estatisticas` (carregar_estatisticas_limpeza): nulos e outliers usam os valores do treino
+    em vez dos calculados nos próprios dados, e categorias fora do vocabulário viram nulo em
+    vez de falhar. Só os valores únicos (para a correção de digitação) vêm dos dados.
+    """
+    schema = dados.collect_schema()
+    # Colunas já numéricas (ex.: data/raw/base_treinamento.parquet) não passam pelo limpar_moeda
+    lf = dados.lazy().with_columns([limpar_moeda(pl.col(c)) for c in colunas_moeda if schema.get(c) == pl.String])
+    calculadas = estatisticas_limpeza(lf, valores_validos, {} if estatisticas else limites_outliers)
+    if estatisticas:
+        limites_outliers = estatisticas["limites"]
+        calculadas = {**calculadas, "nulos": estatisticas["nulos"], "outliers": estatisticas["outliers"]}
+    lf = (
+        lf.pipe(substituir_nulos_lazy, calculadas)
+        .pipe(corrigir_erros_digitacao_lazy, calculadas, valores_validos)
+        .pipe(tratar_outliers_lazy, calculadas, limites_outliers)
+        .pipe(feature_engineering)
+        .pipe(tipar_categoricas, estrito=estatisticas is None)
+    )
+    return lf.collect(engine="streaming" if streaming else "auto")
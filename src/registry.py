@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+import joblib
+import numpy as np
+import polars as pl
+
+from src.const import COL_NUMERICAS, LIMITES_OUTLIERS, VALORES_VALIDOS
+from src.engine import carregar_modelo
+from src.preprocessador import Preprocessador, ler_plano_selecao
+from src.processing import carregar_estatisticas_limpeza, feature_engineering, pipeline_limpeza
+
+
+def assinatura_diretorio(diretorio: str) -> tuple:
+    """
+    Retorna uma "impressão digital" barata do diretório de artefatos
+    (nome, tamanho e data de modificação de cada .joblib/.json).
+    """
+    arquivos = []
+    for nome in sorted(os.listdir(diretorio)):
+        if nome.endswith((".joblib", ".json")):
+            info = os.stat(os.path.join(diretorio, nome))
+            arquivos.append((nome, info.st_size, info.st_mtime_ns))
+    return tuple(arquivos)
+
+
+def assinatura_arquivos(caminhos) -> tuple:
+    """(nome, tamanho, mtime) de cada arquivo existente, como assinatura_diretorio."""
+    arquivos = []
+    for caminho in caminhos:
+        if os.path.exists(caminho):
+            info = os.stat(caminho)
+            arquivos.append((os.path.basename(caminho), info.st_size, info.st_mtime_ns))
+    return tuple(arquivos)
+
+
+class ArtefatosPreprocessamento:
+    """
+    Foto imutável de todos os artefatos de um treino (preprocessador, plano de
+    seleção, estatísticas de limpeza e modelo) carregados em memória de uma só vez. Se os três não vêm
+    do mesmo treino, a foto é recusada.
+    """
+
+    def __init__(self, diretorio: str = "objects", caminho_npz: str = "meu_modelo.npz",
+                 caminho_keras: str = "meu_modelo.keras"):
+        self.diretorio = diretorio
+        self.caminhos_modelo = (caminho_npz, caminho_keras)
+        self.assinatura = assinatura_artefatos(diretorio, caminho_npz, caminho_keras)
+        caminho = os.path.join(diretorio, "preprocessador.joblib")
+        if os.path.exists(caminho):
+            self.preprocessador = Preprocessador.load(caminho)
+        else:
+            # Artefatos antigos: um scaler/encoder por coluna
+            self.preprocessador = Preprocessador.from_legacy(diretorio)
+
+        caminho_plano = os.path.join(diretorio, "plano_selecao.json")
+        if os.path.exists(caminho_plano):
+            # Só a lista de colunas: o RFE (e a floresta dentro dele) não é carregado
+            plano = ler_plano_selecao(caminho_plano)
+            self.colunas = plano["colunas"]
+            treino_plano = plano.get("treino")
+        else:
+            selector = joblib.load(os.path.join(diretorio, "selector.joblib"))
+            self.colunas = [c for c, manter in zip(self.preprocessador.colunas, selector.get_support()) if manter]
+            treino_plano = None
+
+        caminho_limpeza = os.path.join(diretorio, "limpeza.json")
+        # Artefatos antigos não têm as estatísticas: limpar() usa as do próprio lote
+        self.limpeza = carregar_estatisticas_limpeza(caminho_limpeza) if os.path.exists(caminho_limpeza) else None
+
+        self.model = carregar_modelo(caminho_npz, caminho_keras)
+        treinos = {
+            "preprocessador": self.preprocessador.treino,
+            "plano de seleção": treino_plano,
+            **({"limpeza": self.limpeza.get("treino")} if self.limpeza else {}),
+            "modelo": getattr(self.model, "treino", None),
+        }
+        if len(set(treinos.values())) > 1:
+            raise ValueError(f"Artefatos de treinos diferentes: {treinos}")
+        self.treino = treino_plano
+
+    def limpar(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Limpeza do treino (pipeline_limpeza) em dados brutos, como data/raw/base_treinamento.parquet,
+        com as modas/medianas do treino. Valores que não puderem ser corrigidos ficam nulos.
+        """
+        # Texto não numérico vira nulo e é preenchido como um nulo qualquer
+        moeda = ("valorsolicitado", "valortotalbem")
+        df = df.with_columns([
+            pl.col(c).cast(pl.Float64, strict=False) for c in COL_NUMERICAS
+            if c in df.columns and (c not in moeda or df.schema[c] != pl.String)
+        ])
+        return pipeline_limpeza(df, VALORES_VALIDOS, LIMITES_OUTLIERS, colunas_moeda=moeda,
+                                estatisticas=self.limpeza)
+
+    def transform(self, df: pl.DataFrame):
+        # Equivalente ao selector.transform, mas só as colunas selecionadas são calculadas,
+        # direto em float32 (o dtype do modelo): o motor NumPy não precisa converter a matriz
+        return self.preprocessador.transform(df, self.colunas, dtype=np.float32)
+
+    def predict(self, X):
+        return self.model.predict(X, verbose=0)
+
+    def prever(self, df: pl.DataFrame):
+        # transform e predict da mesma foto: nunca o modelo de um treino com o plano de outro
+        return self.predict(self.transform(df))
+
+
+def assinatura_artefatos(diretorio: str, caminho_npz: str, caminho_keras: str) -> tuple:
+    return assinatura_diretorio(diretorio) + assinatura_arquivos([caminho_npz, caminho_keras])
+
+
+def preparar_entrada(batch) -> pl.DataFrame:
+    """
+    Converte o payload (dicionário de listas ou DataFrame) no DataFrame Polars
+    de entrada do modelo: engenharia de atributos e tipagem das colunas numéricas.
+    """
+    df = batch if isinstance(batch, pl.DataFrame) else pl.DataFrame(batch)
+    # Valores não numéricos viram nulo (como o pd.to_numeric(errors='coerce'))
+    df = df.with_columns([pl.col(col).cast(pl.Float64, strict=False) for col in COL_NUMERICAS if col in df.columns])
+
+    if 'proporcaosolicitadototal' not in df.columns:
+        df = feature_engineering(df)
+    return df
+
+
+class PreprocessingRegistry:
+    """
+    Mantém os artefatos (pré-processamento e modelo) em memória e os recarrega
+    quando o diretório `objects/` ou os arquivos do modelo mudam.
+
+    A recarga acontece em uma thread separada: enquanto os novos arquivos são
+    lidos, as requisições continuam usando a foto antiga. A troca é apenas a
+    atribuição de uma referência, portanto atômica para quem está lendo.
+    """
+
+    def __init__(self, diretorio: str = "objects", intervalo_verificacao: float = 2.0,
+                 caminho_npz: str = "meu_modelo.npz", caminho_keras: str = "meu_modelo.keras"):
+        self.diretorio = diretorio
+        self.intervalo_verificacao = intervalo_verificacao
+        self.caminhos_modelo = (caminho_npz, caminho_keras)
+        self._artefatos = ArtefatosPreprocessamento(diretorio, *self.caminhos_modelo)
+        self._lock = threading.Lock()
+        self._recarregando = False
+        self._ultima_verificacao = time.monotonic()
+
+    @property
+    def artefatos(self) -> ArtefatosPreprocessamento:
+        self._verificar_mudancas()
+        return self._artefatos
+
+    def transform(self, batch):
+        # Guardamos a referência localmente: uma recarga no meio da chamada não afeta este lote
+        artefatos = self.artefatos
+        return artefatos.transform(preparar_entrada(batch))
+
+    def prever(self, batch):
+        artefatos = self.artefatos
+        return artefatos.prever(preparar_entrada(batch))
+
+    def recarregar(self) -> bool:
+        """Carrega uma nova foto dos artefatos e troca a referência. Retorna True se trocou."""
+        try:
+            novos = ArtefatosPreprocessamento(self.diretorio, *self.caminhos_modelo)
+        except Exception as e:
+            # Arquivos ainda sendo gravados: mantemos a foto atual e tentamos de novo depois
+            print(f"⚠️ Falha ao recarregar artefatos, mantendo a versão atual: {e}")
+            return False
+        finally:
+            self._recarregando = False
+        self._artefatos = novos
+        return True
+
+    def _verificar_mudancas(self):
+        agora = time.monotonic()
+        if agora - self._ultima_verificacao < self.intervalo_verificacao:
+            return
+        with self._lock:
+            if self._recarregando or agora - self._ultima_verificacao < self.intervalo_verificacao:
+                return
+            self._ultima_verificacao = agora
+            try:
+                mudou = assinatura_artefatos(self.diretorio, *self.caminhos_modelo) != self._artefatos.assinatura
+            except OSError:
+                return
+            if not mudou:
+                return
+            self._recarregando = True
+        threading.Thread(target=self.recarregar, daemon=True).start()
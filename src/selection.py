@@ -0,0 +1,105 @@
+import hashlib
+import os
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.base import clone
+
+DIRETORIO_CACHE_SELECAO = ".cache/selecao"
+# Parâmetros que não mudam o resultado do ajuste (ficam fora da impressão digital)
+PARAMETROS_IGNORADOS = ("n_jobs", "verbose")
+
+
+def impressao_digital(X, y, estimador) -> str:
+    """Hash dos dados, do alvo, dos parâmetros do estimador e da versão do sklearn."""
+    h = hashlib.blake2b(digest_size=16)
+    for arr in (np.ascontiguousarray(X), np.ascontiguousarray(y)):
+        h.update(repr((arr.shape, arr.dtype.str)).encode())
+        h.update(arr.tobytes())
+    parametros = {k: v for k, v in estimador.get_params().items() if k not in PARAMETROS_IGNORADOS}
+    h.update(repr((type(estimador).__name__, sorted(parametros.items()), sklearn.__version__)).encode())
+    return h.hexdigest()
+
+
+class SelecaoRFE:
+    """
+    Eliminação recursiva de atributos (mesma regra do sklearn RFE com step=1)
+    com o ranking de cada passo guardado em disco.
+
+    A cada passo o estimador é ajustado nas colunas restantes e a de menor
+    importância sai (np.argsort, como no RFE). Como a sequência de eliminação
+    não depende do número final de atributos, `suporte(n)` para qualquer `n`
+    reaproveita os passos já calculados: 8, 10 ou 12 atributos custam no
+    máximo os ajustes que ainda não foram feitos para aqueles dados.
+    """
+
+    def __init__(self, estimador, n_jobs: int = -1, diretorio_cache: str = DIRETORIO_CACHE_SELECAO):
+        self.estimador = clone(estimador)
+        # Usa todos os núcleos se o estimador aceitar (o resultado da floresta não depende de n_jobs)
+        if "n_jobs" in self.estimador.get_params() and self.estimador.get_params()["n_jobs"] is None:
+            self.estimador.set_params(n_jobs=n_jobs)
+        self.diretorio_cache = diretorio_cache
+        self.passos = []
+
+    @property
+    def caminho_cache(self) -> str:
+        return os.path.join(self.diretorio_cache, f"{self.chave}.joblib")
+
+    def fit(self, X, y):
+        # float32/float64 entram como estão (a floresta já trabalha em float32): sem cópia da matriz
+        self.X = np.asarray(X)
+        if not np.issubdtype(self.X.dtype, np.floating):
+            self.X = self.X.astype(np.float64)
+        self.y = np.asarray(y)
+        self.n_atributos = self.X.shape[1]
+        self.chave = impressao_digital(self.X, self.y, self.estimador)
+        self.passos = joblib.load(self.caminho_cache)["passos"] if os.path.exists(self.caminho_cache) else []
+        if self.passos:
+            print(f"♻️ Seleção: {len(self.passos)} passos de eliminação reaproveitados do cache ({self.chave[:8]})")
+        return self
+
+    def _salvar(self):
+        os.makedirs(self.diretorio_cache, exist_ok=True)
+        temporario = f"{self.caminho_cache}.tmp"
+        joblib.dump({"chave": self.chave, "passos": self.passos}, temporario)
+        os.replace(temporario, self.caminho_cache)
+
+    def _restantes(self) -> np.ndarray:
+        suporte = np.ones(self.n_atributos, dtype=bool)
+        for passo in self.passos:
+            suporte[passo["eliminada"]] = False
+        return np.flatnonzero(suporte)
+
+    def eliminar_ate(self, n_atributos: int):
+        """Calcula (e guarda) os passos que faltam para chegar a `n_atributos` colunas."""
+        restantes = self._restantes()
+        while len(restantes) > max(n_atributos, 1):
+            estimador = clone(self.estimador).fit(self.X[:, restantes], self.y)
+            importancias = np.asarray(estimador.feature_importances_)
+            eliminada = int(restantes[np.argsort(importancias)[0]])
+            self.passos.append({
+                "colunas": restantes.tolist(),
+                "importancias": importancias.tolist(),
+                "eliminada": eliminada,
+            })
+            self._salvar()
+            restantes = restantes[restantes != eliminada]
+        return self
+
+    def suporte(self, n_atributos: int) -> np.ndarray:
+        """Máscara booleana igual ao RFE(..., n_features_to_select=n_atributos).get_support()."""
+        self.eliminar_ate(n_atributos)
+        mascara = np.ones(self.n_atributos, dtype=bool)
+        for passo in self.passos[:self.n_atributos - n_atributos]:
+            mascara[passo["eliminada"]] = False
+        return mascara
+
+    def ranking(self, n_atributos: int = 1) -> np.ndarray:
+        """Igual ao RFE.ranking_: 1 para as selecionadas, crescendo na ordem inversa da eliminação."""
+        self.eliminar_ate(n_atributos)
+        ranking = np.ones(self.n_atributos, dtype=int)
+        eliminadas = [p["eliminada"] for p in self.passos[:self.n_atributos - n_atributos]]
+        for posicao, coluna in enumerate(reversed(eliminadas)):
+            ranking[coluna] = posicao + 2
+        return ranking
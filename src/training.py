@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import time
+
+import numpy as np
+import polars as pl
+
+CAMINHO_FEATURES_TREINO = "data/features/treino.parquet"
+ALVO = "alvo"
+
+BATCH_SIZE_PADRAO = 256
+EPOCAS_MAXIMAS = 500
+PACIENCIA = 10
+AUC_ALVO = 0.90
+# Configuração original do curso (Adam 0.001 com batch_size=10): base da escala da taxa de aprendizado
+TAXA_BASE = 0.001
+BATCH_BASE = 10
+
+
+def salvar_features(X, y, colunas: list, caminho: str = CAMINHO_FEATURES_TREINO) -> str:
+    """Grava a matriz já pré-processada (float32) e o alvo em Parquet."""
+    df = pl.DataFrame(np.asarray(X, dtype=np.float32), schema=list(colunas), orient="row")
+    df = df.with_columns(pl.Series(ALVO, np.asarray(y), dtype=pl.Int8))
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    df.write_parquet(caminho, compression="zstd")
+    return caminho
+
+
+def ler_features(caminho: str = CAMINHO_FEATURES_TREINO) -> tuple:
+    """Retorna (X float32, y float32, colunas) a partir do Parquet de features."""
+    df = pl.read_parquet(caminho)
+    colunas = [c for c in df.columns if c != ALVO]
+    # Colunas Float32 → uma única cópia, já C-contígua (layout do tf.data e do motor NumPy)
+    X = df.select(colunas).to_numpy(order="c")
+    y = df.get_column(ALVO).cast(pl.Float32).to_numpy()
+    return X, y, colunas
+
+
+def construir_modelo(n_entradas: int):
+    """Arquitetura do curso: Dense 128-64-32 (ReLU, Dropout 0.3) e saída sigmoide."""
+    import tensorflow as tf
+
+    return tf.keras.Sequential([
+        tf.keras.layers.Dense(128, activation='relu', input_shape=(n_entradas,)),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(64, activation='relu'),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(32, activation='relu'),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(1, activation='sigmoid')
+    ])
+
+
+def dividir_validacao(X, y, fracao: float = 0.2) -> tuple:
+    # Igual ao validation_split do Keras: as últimas linhas, sem embaralhar
+    corte = int(math.ceil(len(X) * (1 - fracao)))
+    return X[:corte], y[:corte], X[corte:], y[corte:]
+
+
+def criar_dataset(X, y, batch_size: int, embaralhar: bool = True, seed: int = None):
+    """tf.data em memória: cache, embaralhamento a cada época, lotes e prefetch."""
+    import tensorflow as tf
+
+    ds = tf.data.Dataset.from_tensor_slices((X, y)).cache()
+    if embaralhar:
+        ds = ds.shuffle(len(X), seed=seed, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def taxa_aprendizado(batch_size: int, base: float = TAXA_BASE, batch_base: int = BATCH_BASE,
+                     regra: str = "raiz") -> float:
+    """
+    Escala a taxa de aprendizado com o tamanho do lote.
+    "raiz" (padrão, mais estável com Adam): base * sqrt(batch/batch_base); "linear": base * batch/batch_base.
+    """
+    fator = batch_size / batch_base
+    return base * (math.sqrt(fator) if regra == "raiz" else fator)
+
+
+def _callback_metricas(auc_alvo: float):
+    import tensorflow as tf
+
+    class MetricasTreino(tf.keras.callbacks.Callback):
+        """Épocas por segundo e tempo até a AUC de validação atingir `auc_alvo`."""
+
+        def on_train_begin(self, logs=None):
+            self.inicio = time.perf_counter()
+            self.duracoes = []
+            self.tempo_ate_alvo = None
+            self.epoca_alvo = None
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self.inicio_epoca = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.duracoes.append(time.perf_counter() - self.inicio_epoca)
+            if self.tempo_ate_alvo is None and (logs or {}).get("val_auc", 0.0) >= auc_alvo:
+                self.tempo_ate_alvo = time.perf_counter() - self.inicio
+                self.epoca_alvo = epoch + 1
+
+    return MetricasTreino()
+
+
+def treinar(model, X, y, batch_size: int = BATCH_SIZE_PADRAO, epocas: int = EPOCAS_MAXIMAS,
+            paciencia: int = PACIENCIA, auc_alvo: float = AUC_ALVO, fracao_validacao: float = 0.2,
+            regra_taxa: str = "raiz", seed: int = None, caminho_relatorio: str = None, verbose: int = 1) -> tuple:
+    """
+    Compila e treina `model` com tf.data, taxa de aprendizado escalada pelo lote e
+    EarlyStopping (val_loss, restaurando os melhores pesos). Retorna (history, relatorio).
+    """
+    import tensorflow as tf
+
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    X_tr, y_tr, X_val, y_val = dividir_validacao(X, y, fracao_validacao)
+    ds_treino = criar_dataset(X_tr, y_tr, batch_size, embaralhar=True, seed=seed)
+    ds_validacao = criar_dataset(X_val, y_val, batch_size, embaralhar=False)
+
+    taxa = taxa_aprendizado(batch_size, regra=regra_taxa)
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=taxa),
+        loss="binary_crossentropy",
+        metrics=["accuracy", tf.keras.metrics.AUC(name="auc")],
+    )
+    metricas = _callback_metricas(auc_alvo)
+    parada = tf.keras.callbacks.EarlyStopping(
+        monitor="val_loss", patience=paciencia, mode="min", restore_best_weights=True, verbose=verbose
+    )
+
+    # shuffle=False: o embaralhamento já acontece no tf.data
+    history = model.fit(ds_treino, validation_data=ds_validacao, epochs=epocas, shuffle=False,
+                        callbacks=[parada, metricas], verbose=verbose)
+
+    duracao = time.perf_counter() - metricas.inicio
+    relatorio = {
+        "batch_size": batch_size,
+        "taxa_aprendizado": taxa,
+        "epocas": len(metricas.duracoes),
+        "melhor_epoca": int(np.argmin(history.history["val_loss"])) + 1,
+        "segundos": duracao,
+        "epocas_por_segundo": len(metricas.duracoes) / sum(metricas.duracoes),
+        "auc_alvo": auc_alvo,
+        "melhor_val_auc": float(max(history.history["val_auc"])),
+        "segundos_ate_auc_alvo": metricas.tempo_ate_alvo,
+        "epoca_auc_alvo": metricas.epoca_alvo,
+    }
+    ate_alvo = f"{relatorio['segundos_ate_auc_alvo']:.1f}s" if metricas.tempo_ate_alvo is not None else "não atingida"
+    print(f"⏱️ {relatorio['epocas']} épocas em {duracao:.1f}s ({relatorio['epocas_por_segundo']:.2f} épocas/s) | "
+          f"AUC {auc_alvo}: {ate_alvo} | melhor val_auc {relatorio['melhor_val_auc']:.4f}")
+
+    if caminho_relatorio:
+        with open(caminho_relatorio, "w") as f:
+            json.dump(relatorio, f, indent=2)
+    return history, relatorio
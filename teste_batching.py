@@ -0,0 +1,106 @@
+"""
+Conferência do micro-batching (src/batching.py) com requisições concorrentes, sem servidor:
+a API Flask (test client) e a ASGI em modo thread (chamada direta do app).
+
+Requisições simultâneas devem dividir um forward pass; se cada uma sair em um lote
+próprio, o micro-batching está desligado na prática.
+
+    python teste_batching.py
+"""
+import asyncio
+import json
+import os
+import threading
+
+# Janela larga: todas as requisições de cada rodada chegam dentro dela
+os.environ.setdefault('BATCH_WINDOW_MS', '200')
+os.environ.setdefault('BATCH_MAX_SIZE', '256')
+os.environ.setdefault('ASGI_EXECUTOR', 'thread')
+
+N_REQUISICOES = 32
+
+
+def payload(i: int) -> dict:
+    # Um cliente diferente por requisição: nenhuma é respondida pelo cache de previsões
+    return {
+        'profissao': ['Advogado'], 'tempoprofissao': [5], 'renda': [5000.0 + i], 'tiporesidencia': ['Própria'],
+        'escolaridade': ['Superior'], 'score': ['Bom'], 'idade': [30], 'dependentes': [0],
+        'estadocivil': ['Casado'], 'produto': ['DoubleDuty'], 'valorsolicitado': [10000.0],
+        'valortotalbem': [20000.0],
+    }
+
+
+def conferir(condicao: bool, mensagem: str):
+    if not condicao:
+        raise SystemExit(f"❌ {mensagem}")
+    print(f"✅ {mensagem}")
+
+
+def conferir_flask():
+    import api
+
+    cliente = api.app.test_client()
+    barreira = threading.Barrier(N_REQUISICOES)
+    status = []
+
+    def enviar(i):
+        barreira.wait()
+        status.append(cliente.post('/predict', json=payload(i)).status_code)
+
+    threads = [threading.Thread(target=enviar, args=(i,)) for i in range(N_REQUISICOES)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    metricas = api.batcher.metricas()
+    conferir(status == [200] * N_REQUISICOES, f"Flask: {N_REQUISICOES} requisições respondidas")
+    conferir(metricas['lotes'] < N_REQUISICOES / 2,
+             f"Flask: requisições concorrentes dividem lotes ({metricas['histograma_lotes']})")
+
+
+async def chamar_asgi(app, corpo: bytes) -> int:
+    enviados, lido = [], [False]
+
+    async def receive():
+        if not lido[0]:
+            lido[0] = True
+            return {'type': 'http.request', 'body': corpo, 'more_body': False}
+        await asyncio.sleep(3600)
+
+    async def send(mensagem):
+        enviados.append(mensagem)
+
+    await app({'type': 'http', 'method': 'POST', 'path': '/predict', 'headers': []}, receive, send)
+    return enviados[0]['status']
+
+
+async def conferir_asgi():
+    import api_asgi
+
+    fila, saidas = asyncio.Queue(), []
+
+    async def send(mensagem):
+        saidas.append(mensagem)
+
+    await fila.put({'type': 'lifespan.startup'})
+    ciclo = asyncio.create_task(api_asgi.app({'type': 'lifespan'}, fila.get, send))
+    while not saidas:
+        await asyncio.sleep(0.01)
+
+    status = await asyncio.gather(*[
+        chamar_asgi(api_asgi.app, json.dumps(payload(i)).encode()) for i in range(N_REQUISICOES)
+    ])
+    metricas = api_asgi.estado['batcher'].metricas()
+    await fila.put({'type': 'lifespan.shutdown'})
+    await ciclo
+
+    conferir(list(status) == [200] * N_REQUISICOES, f"ASGI: {N_REQUISICOES} requisições respondidas")
+    conferir(metricas['lotes'] < N_REQUISICOES / 2,
+             f"ASGI (thread): requisições concorrentes dividem lotes ({metricas['histograma_lotes']})")
+
+
+if __name__ == '__main__':
+    conferir_flask()
+    asyncio.run(conferir_asgi())
+    print("🏁 Micro-batching conferido")
@@ -0,0 +1,66 @@
+"""
+Conferência do PoolConexoes (src/database.py) contra um Postgres local.
+
+Usa as mesmas variáveis do .env (DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME);
+só roda consultas de leitura e pg_terminate_backend nas conexões do próprio pool.
+
+    python teste_pool.py
+"""
+import time
+
+from src.database import PoolConexoes, execute_query, executar_consultas
+
+MINIMO, MAXIMO = 2, 3
+
+
+def pid(conn) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_backend_pid()")
+        return cur.fetchall()[0][0]
+
+
+def conferir(condicao: bool, mensagem: str):
+    if not condicao:
+        raise SystemExit(f"❌ {mensagem}")
+    print(f"✅ {mensagem}")
+
+
+with PoolConexoes(minimo=MINIMO, maximo=MAXIMO, timeout=10, verificar_apos=0) as pool:
+    conferir(pool.metricas()["abertas"] == MINIMO, f"{MINIMO} conexões abertas na criação")
+
+    df = execute_query("SELECT 1 AS um", pool)
+    conferir(df.item() == 1, "Consulta simples pelo pool")
+
+    # Mais consultas do que conexões: nunca passam de MAXIMO ao mesmo tempo
+    tempos = {}
+    inicio = time.perf_counter()
+    executar_consultas({f"q{i}": "SELECT pg_sleep(0.5)" for i in range(MAXIMO * 2)}, pool, tempos=tempos)
+    duracao = time.perf_counter() - inicio
+    conferir(pool.metricas()["abertas"] <= MAXIMO, f"No máximo {MAXIMO} conexões abertas ({pool.metricas()})")
+    conferir(duracao >= 1.0, f"{MAXIMO * 2} consultas de 0.5s em duas levas ({duracao:.2f}s)")
+
+    # Conexão derrubada durante o uso: descartada na devolução e reposta até o mínimo
+    try:
+        with pool.conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_terminate_backend(pg_backend_pid())")
+                cur.fetchall()
+    except Exception as e:
+        print(f"  (erro esperado da conexão derrubada: {type(e).__name__})")
+    metricas = pool.metricas()
+    conferir(metricas["abertas"] >= MINIMO and metricas["livres"] >= MINIMO,
+             f"Conexão derrubada reposta até o mínimo ({metricas})")
+
+    # Conexão livre derrubada por fora: o SELECT 1 (verificar_apos=0) a troca antes de entregar
+    # (a derrubada é devolvida por último, então é a primeira a sair da pilha LIFO)
+    with pool.conexao() as conn, pool.conexao() as outra:
+        alvo = pid(conn)
+        with outra.cursor() as cur:
+            cur.execute(f"SELECT pg_terminate_backend({alvo})")
+            cur.fetchall()
+    time.sleep(0.2)
+    with pool.conexao() as conn:
+        conferir(pid(conn) != alvo, "Conexão derrubada enquanto livre não é entregue")
+    conferir(execute_query("SELECT 2 AS dois", pool).item() == 2, "Pool continua respondendo")
+
+print("🏁 Pool de conexões conferido")
@@ -1,12 +1,9 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import tensorflow as tf
-import polars as pl
-import os
 
-# Importando suas funções de processamento
-from src.processing import load_scalers, load_encoders, feature_engineering
+# Registro com preprocessador, plano de seleção e modelo carregados uma única vez
+from src.registry import PreprocessingRegistry
+from src.const import (PROFISSOES_VALIDAS, TIPOS_RESIDENCIA_VALIDOS, ESCOLARIDADES_VALIDAS, SCORES_VALIDOS,
+                       ESTADOS_CIVIS_VALIDOS, PRODUTOS_VALIDOS)
 
 # Título da aplicação
 st.set_page_config(page_title="Análise de Crédito IA", layout="centered")
@@ -15,23 +12,21 @@ st.title("🛡️ Sistema de Previsão de Empréstimos")
 # 1. Carregamento dos Modelos (Usando cache para performance)
 @st.cache_resource
 def load_models():
-    # Carrega o modelo Keras e o seletor de atributos
-    model = tf.keras.models.load_model('meu_modelo.keras')
-    selector = joblib.load('objects/selector.joblib')
-    return model, selector
+    # Modelo (motor NumPy, sem TensorFlow) e artefatos de pré-processamento do mesmo treino
+    return PreprocessingRegistry('objects', caminho_npz='meu_modelo.npz', caminho_keras='meu_modelo.keras')
 
 try:
-    model, selector = load_models()
+    registry = load_models()
 except Exception as e:
     st.error(f"Erro ao carregar modelos: {e}")
 
-# --- Definição das Opções (Igual ao seu código) ---
-profissoes = ['Advogado', 'Arquiteto', 'Cientista de Dados', 'Contador', 'Dentista', 'Empresário', 'Engenheiro', 'Médico', 'Programador']
-tipos_residencia = ['Alugada', 'Outros', 'Própria']
-escolaridades = ['Ens.Fundamental', 'Ens.Médio', 'PósouMais', 'Superior']
-scores = ['Baixo', 'Bom', 'Justo', 'MuitoBom']
-estados_civis = ['Casado', 'Divorciado', 'Solteiro', 'Víuvo']
-produtos = ['AgileXplorer', 'DoubleDuty', 'EcoPrestige', 'ElegantCruise', 'SpeedFury', 'TrailConqueror', 'VoyageRoamer', 'WorkMaster']
+# --- Definição das Opções (vocabulários únicos em src/const.py) ---
+profissoes = PROFISSOES_VALIDAS
+tipos_residencia = TIPOS_RESIDENCIA_VALIDOS
+escolaridades = ESCOLARIDADES_VALIDAS
+scores = SCORES_VALIDOS
+estados_civis = ESTADOS_CIVIS_VALIDOS
+produtos = PRODUTOS_VALIDOS
 
 # Formuário de entrada
 with st.form(key='prediction_form'):
@@ -69,19 +64,9 @@ if submit_button:
                 'proporcaosolicitadototal': [proporcao]
             }
             
-            df = pd.DataFrame(dados_dict)
-
-            # 3. Processamento (Scalers e Encoders)
-            # Nota: Certifique-se que load_scalers busca na pasta 'objects/'
-            col_numericas = ['tempoprofissao', 'renda', 'idade', 'dependentes', 
-                            'valorsolicitado', 'valortotalbem', 'proporcaosolicitadototal']
-            
-            df = load_scalers(df, col_numericas)
-            df = load_encoders(df, ['profissao', 'tiporesidencia', 'escolaridade', 'score', 'estadocivil', 'produto'])
-            
-            # 4. Seleção de Atributos e Predição
-            df_selected = selector.transform(df)
-            prediction = model.predict(df_selected)
+            # 3. Processamento (Scalers, Encoders), Seleção de Atributos e Predição
+            # (uma só foto dos artefatos: o modelo é sempre o do mesmo treino do plano)
+            prediction = registry.prever(dados_dict)
             
             probabilidade = float(prediction[0][0])
             classe = "BOM" if probabilidade > 0.5 else "RUIM"